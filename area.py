@@ -3,8 +3,62 @@ Area module for the Disneyland Adventure game.
 Handles game world areas (lands, shops) and their connections.
 """
 
+import io
+import sys
+from bisect import bisect_right
+from collections import defaultdict, deque
+from operator import itemgetter
+
 from .coordinates import Coordinates
-from .item import Item # Required for type checking and shop logic
+
+# Characters dropped or replaced when turning an area name into its ID
+_SLUG_TABLE = str.maketrans({' ': '_', '.': '', "'": ''})
+
+def _slugify(name):
+    """Turn an area name into the lowercase slug used in its ID."""
+    return name.lower().translate(_SLUG_TABLE)
+
+def _swap_remove(objects, index_of, obj):
+    """Remove obj from the objects list in O(1) by moving the last entry into its slot.
+
+    index_of maps each object to its position in objects and is kept in step.
+    The list order is not preserved.
+    """
+    i = index_of.pop(obj)
+    last = objects.pop()
+    if i < len(objects):
+        objects[i] = last
+        index_of[last] = i
+
+# Max gap between two areas' edges for connect_all_adjacent_areas to link them
+_ADJACENCY_TOLERANCE = 5
+
+# Opposite of each compass direction, used to add the return connection
+_REVERSE_DIRECTIONS = {
+    "north": "south", "south": "north",
+    "east": "west", "west": "east",
+    "up": "down", "down": "up" # For potential future use
+}
+
+# Top-level lands that list_areas shows under "Main Areas"
+_MAIN_AREA_NAMES = frozenset(["Main Street U.S.A.", "Adventureland", "Fantasyland"])
+
+# Side length (in grid cells) of the Area spatial buckets used by get_objects_within
+_BUCKET_SIZE = 4
+# Below this many items + NPCs, get_objects_within just scans them all
+_SPATIAL_SCAN_THRESHOLD = 32
+
+# Stock level used for items a shop never runs out of
+_INF = float('inf')
+
+# Shared result for empty or off-grid cells, so lookups there don't allocate a fresh list
+_NO_OBJECTS = ()
+
+# Unit (x, y) offsets used when placing an area relative to another one
+_DIRECTION_OFFSETS = {
+    "north": (0, -1), "south": (0, 1),
+    "east": (1, 0), "west": (-1, 0)
+}
 
 # Forward declaration for type hinting if Land, Ride, Shop were in separate files
 # class Land: pass
@@ -13,6 +67,22 @@ from .item import Item # Required for type checking and shop logic
 
 class Area:
     """Area class representing different locations in the game world."""
+    _id_prefix = "area" # Subclasses override this; the ID is f"{_id_prefix}_{slug of name}"
+    # No per-instance __dict__; subclasses list only the attributes they add
+    __slots__ = (
+        'name', 'description', '_area_origin_coords', '_ox', '_oy', '_oz', '_coord_cache',
+        'grid_width', 'grid_length', 'connections', '_connection_labels', 'grid_objects', 'items', 'npcs',
+        '_item_index', '_npc_index', '_buckets', 'portals', 'id', 'is_shop', 'is_shelter',
+        '_parent_area', 'sub_areas', '_sub_area_lnames', '_land_name', '_land_name_version',
+    )
+    is_fence_shop = False # FenceShop overrides this; checked instead of isinstance()
+    # Bumped whenever any area's origin moves, so AreaManager knows its bounds table is stale
+    _geometry_version = 0
+    # Bumped whenever any connection is added, so AreaManager knows its path graph is stale
+    _connections_version = 0
+    # Bumped whenever any parent_area link changes, so cached land names are recomputed
+    _hierarchy_version = 0
+
     def __init__(self, name, description, area_origin_coords=None, grid_width=10, grid_length=10, parent_area=None):
         self.name = name
         self.description = description
@@ -21,58 +91,119 @@ class Area:
         self.grid_width = grid_width
         self.grid_length = grid_length
         self.connections = {}  # direction_str -> connected_Area_object
+        self._connection_labels = {} # direction_str -> capitalised direction, as shown in the exits list
         
-        # For objects within the area's grid
-        # Key: (grid_x, grid_y), Value: list of objects (Item or NPC instances)
-        self.grid_objects = {} 
+        # For objects within the area's grid, indexed as grid_objects[grid_x][grid_y]
+        # Each cell is None until something is placed there, then a list of objects (Item or NPC instances)
+        self.grid_objects = [[None] * grid_length for _ in range(grid_width)]
         self.items = [] # List of Item instances physically in this area
         self.npcs = []  # List of NPC instances physically in this area
-        self.portals = {} # (grid_x, grid_y) -> {'target_area': AreaObject, 'target_gx': int_or_None, 'target_gy': int_or_None}
-        self.id = f"area_{name.lower().replace(' ', '_')}"
+        # obj -> its position in self.items / self.npcs, for O(1) membership checks and removal
+        self._item_index = {}
+        self._npc_index = {}
+        # Coarse spatial hash over the grid for radius queries:
+        # (grid_x // _BUCKET_SIZE, grid_y // _BUCKET_SIZE) -> {obj: None} (a dict keeps insertion order)
+        self._buckets = {}
+        self.portals = {} # (grid_x, grid_y) -> (target_area_id, target_gx_or_None, target_gy_or_None)
+        self.id = sys.intern(f"{self._id_prefix}_{_slugify(name)}")
 
         # Shop-specific attributes
         self.is_shop = False
         self.is_shelter = False # Flag to indicate if this area is a good place to hide
         
+        self._land_name = None
+        self._land_name_version = -1
         self.parent_area = parent_area # Reference to the containing Area (e.g., a Land)
         self.sub_areas = [] # List of Area objects contained within this one
+        self._sub_area_lnames = () # Lowercased names of self.sub_areas, kept in step by add_sub_area
 
     def add_connection(self, direction, connected_area):
         """Add a connection to another area and a reverse connection."""
         if not isinstance(connected_area, Area):
             print(f"Error: Attempted to connect {self.name} to non-Area object: {connected_area}")
             return
-        self.connections[direction.lower()] = connected_area
-        reverse_directions = {
-            "north": "south", "south": "north",
-            "east": "west", "west": "east",
-            "up": "down", "down": "up" # For potential future use
-        }
-        if direction.lower() in reverse_directions:
-            reverse_dir = reverse_directions[direction.lower()]
-            if reverse_dir not in connected_area.connections:
-                connected_area.add_connection(reverse_dir, self)
+        direction = sys.intern(direction.lower()) # Interned so connection lookups compare by identity
+        self.connections[direction] = connected_area
+        self._connection_labels[direction] = direction.capitalize()
+        Area._connections_version += 1
+        reverse_dir = _REVERSE_DIRECTIONS.get(direction)
+        if reverse_dir is not None and reverse_dir not in connected_area.connections:
+            # Set the reverse link directly; it only needs to exist, not to recurse back
+            connected_area.connections[reverse_dir] = self
+            connected_area._connection_labels[reverse_dir] = reverse_dir.capitalize()
 
     def add_sub_area(self, sub_area_object):
         """Adds a sub-area (like a Ride or Shop) to this area (typically a Land)."""
         if isinstance(sub_area_object, Area) and sub_area_object not in self.sub_areas:
             self.sub_areas.append(sub_area_object)
+            self._sub_area_lnames += (sub_area_object.name.lower(),)
             sub_area_object.parent_area = self
             # print(f"DEBUG: Added {sub_area_object.name} as sub-area to {self.name}")
 
-    def add_portal(self, from_gx, from_gy, target_area, target_gx=None, target_gy=None):
-        """Adds a portal at a specific grid cell that teleports to another area."""
+    def add_portal(self, from_gx, from_gy, target_area_id, target_gx=None, target_gy=None):
+        """
+        Adds a portal at a specific grid cell that teleports to another area.
+        The target is stored by ID and looked up when the portal is used, so it
+        may name an area that hasn't been created yet. An Area object is also accepted.
+        """
         if not self.is_valid_grid_position(from_gx, from_gy):
             print(f"Warning: Cannot add portal at invalid grid ({from_gx},{from_gy}) in {self.name}.")
             return
-        if not isinstance(target_area, Area): # Ensure target_area is an Area instance
-            print(f"Warning: Portal target in {self.name} from ({from_gx},{from_gy}) is not a valid Area object: {target_area}")
+        if isinstance(target_area_id, Area):
+            target_area_id = target_area_id.id
+        if not isinstance(target_area_id, str): # Ensure we have an area ID
+            print(f"Warning: Portal target in {self.name} from ({from_gx},{from_gy}) is not a valid area ID: {target_area_id}")
             return
-        self.portals[(from_gx, from_gy)] = {
-            'target_area': target_area,
-            'target_gx': target_gx, # Target grid x in the new area (optional, defaults to center)
-            'target_gy': target_gy  # Target grid y in the new area (optional, defaults to center)
-        }
+        # Target grid x/y in the new area are optional and default to its center
+        self.portals[(from_gx, from_gy)] = (sys.intern(target_area_id), target_gx, target_gy)
+
+    def resolve_portal(self, grid_x, grid_y, area_manager):
+        """
+        Look up the portal at (grid_x, grid_y).
+        Returns (target_area, target_gx, target_gy), or None if there is no portal
+        there or its target area isn't registered with area_manager.
+        """
+        portal = self.portals.get((grid_x, grid_y))
+        if portal is None:
+            return None
+        target_area = area_manager.get_area_by_id(portal[0])
+        if target_area is None:
+            return None
+        return target_area, portal[1], portal[2]
+
+    @property
+    def area_origin_coords(self):
+        """The global coordinates of the (0,0) point of this area's grid."""
+        return self._area_origin_coords
+
+    @area_origin_coords.setter
+    def area_origin_coords(self, coords):
+        self._area_origin_coords = coords
+        Area._geometry_version += 1
+        # Plain-int copies of the origin for the grid <-> global conversions below
+        self._ox, self._oy, self._oz = coords.x, coords.y, coords.z
+        # (grid_x, grid_y, grid_z) -> shared Coordinates; stale once the origin moves
+        self._coord_cache = {}
+
+    @property
+    def parent_area(self):
+        """The containing Area (e.g., a Land), or None for a top-level area."""
+        return self._parent_area
+
+    @parent_area.setter
+    def parent_area(self, area):
+        self._parent_area = area
+        Area._hierarchy_version += 1
+
+    def get_land_name(self):
+        """Name of the topmost area above this one (normally its Land), cached until the hierarchy changes."""
+        if self._land_name_version != Area._hierarchy_version:
+            area = self
+            while area._parent_area:
+                area = area._parent_area
+            self._land_name = area.name
+            self._land_name_version = Area._hierarchy_version
+        return self._land_name
 
     def is_valid_grid_position(self, grid_x, grid_y):
         """Check if the given grid coordinates are within the area's bounds."""
@@ -80,62 +211,194 @@ class Area:
 
     def get_global_coordinates(self, grid_x, grid_y, grid_z=0):
         """Convert local grid coordinates to global world coordinates."""
-        return Coordinates(
-            self.area_origin_coords.x + grid_x,
-            self.area_origin_coords.y + grid_y,
-            self.area_origin_coords.z + grid_z # Assuming items/NPCs are at base Z of area for now
-        )
+        # Assuming items/NPCs are at base Z of area for now
+        # Coordinates are never mutated after creation, so one instance per cell can be shared
+        key = (grid_x, grid_y, grid_z)
+        coords = self._coord_cache.get(key)
+        if coords is None:
+            coords = Coordinates(self._ox + grid_x, self._oy + grid_y, self._oz + grid_z)
+            self._coord_cache[key] = coords
+        return coords
 
     def get_relative_coordinates(self, global_coords):
         """Convert global world coordinates to local grid coordinates."""
         return (
-            global_coords.x - self.area_origin_coords.x,
-            global_coords.y - self.area_origin_coords.y,
-            global_coords.z - self.area_origin_coords.z
+            global_coords.x - self._ox,
+            global_coords.y - self._oy,
+            global_coords.z - self._oz
         )
 
+    def get_relative_grid(self, global_coords):
+        """Grid cell (x, y) of global world coordinates, as ints; no z and no slicing needed."""
+        return int(global_coords.x - self._ox), int(global_coords.y - self._oy)
+
     def add_object_to_grid(self, obj, grid_x, grid_y):
         """Adds an object (Item or NPC) to a specific grid cell and updates its global coords."""
-        if not self.is_valid_grid_position(grid_x, grid_y):
+        if not (0 <= grid_x < self.grid_width and 0 <= grid_y < self.grid_length): # Inlined is_valid_grid_position
             print(f"Warning: Cannot place {obj.name} at ({grid_x},{grid_y}) in {self.name}. Out of bounds.")
             return
 
         obj.coordinates = self.get_global_coordinates(grid_x, grid_y)
         
-        grid_pos = (grid_x, grid_y)
-        if grid_pos not in self.grid_objects:
-            self.grid_objects[grid_pos] = []
+        column = self.grid_objects[grid_x]
+        cell = column[grid_y]
+        if cell is None:
+            cell = column[grid_y] = []
         
-        if obj not in self.grid_objects[grid_pos]:
-            self.grid_objects[grid_pos].append(obj)
-
-        # Using string comparison for type to avoid circular import with Npc here
-        if isinstance(obj, Item) and obj not in self.items:
+        if obj not in cell:
+            cell.append(obj)
+            bucket_key = (grid_x // _BUCKET_SIZE, grid_y // _BUCKET_SIZE)
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                bucket = self._buckets[bucket_key] = {}
+            bucket[obj] = None
+
+        # Items and NPCs are told apart by class-level flags (this also avoids importing npc.py here)
+        if obj._is_item and obj not in self._item_index:
+            self._item_index[obj] = len(self.items)
             self.items.append(obj)
-        elif obj.__class__.__name__ == "NPC" and obj not in self.npcs: # Check for NPC type
-            self.npcs.append(obj)
-            obj.location = self # NPC needs to know its area
+        elif obj._is_npc:
+            if obj not in self._npc_index:
+                self._npc_index[obj] = len(self.npcs)
+                self.npcs.append(obj)
+                obj.location = self # NPC needs to know its area
+            obj._gx, obj._gy = grid_x, grid_y # NPCs cache their cell to skip coordinate conversions
 
     def remove_object_from_grid(self, obj, grid_x, grid_y):
         """Removes an object from a specific grid cell."""
-        grid_pos = (grid_x, grid_y)
-        if grid_pos in self.grid_objects and obj in self.grid_objects[grid_pos]:
-            self.grid_objects[grid_pos].remove(obj)
-            if not self.grid_objects[grid_pos]:
-                del self.grid_objects[grid_pos]
-
-        if isinstance(obj, Item) and obj in self.items:
-            self.items.remove(obj)
-        elif obj.__class__.__name__ == "NPC" and obj in self.npcs: # Check for NPC type
-            self.npcs.remove(obj)
+        if 0 <= grid_x < self.grid_width and 0 <= grid_y < self.grid_length: # Inlined is_valid_grid_position
+            column = self.grid_objects[grid_x]
+            cell = column[grid_y]
+            if cell is not None:
+                try:
+                    cell.remove(obj)
+                except ValueError:
+                    pass # Not in this cell
+                else:
+                    if not cell:
+                        column[grid_y] = None
+                    bucket_key = (grid_x // _BUCKET_SIZE, grid_y // _BUCKET_SIZE)
+                    bucket = self._buckets.get(bucket_key)
+                    if bucket is not None:
+                        bucket.pop(obj, None)
+                        if not bucket:
+                            del self._buckets[bucket_key]
+
+        # Index membership already implies the type, so no isinstance/flag check is needed
+        if obj in self._item_index:
+            _swap_remove(self.items, self._item_index, obj)
+        elif obj in self._npc_index:
+            _swap_remove(self.npcs, self._npc_index, obj)
+            obj._gx = obj._gy = None # No longer on this grid; get_grid_position falls back to coordinates
+
+    def has_npc(self, npc):
+        """True if npc is currently placed on this area's grid."""
+        return npc in self._npc_index
 
     def get_objects_at_grid_cell(self, grid_x, grid_y):
-        """Get all objects at a specific grid cell."""
-        return self.grid_objects.get((grid_x, grid_y), [])
+        """Get all objects at a specific grid cell (read-only; copy it before mutating)."""
+        if 0 <= grid_x < self.grid_width and 0 <= grid_y < self.grid_length: # Inlined is_valid_grid_position
+            return self.grid_objects[grid_x][grid_y] or _NO_OBJECTS
+        return _NO_OBJECTS
+
+    def get_objects_within(self, center_x, center_y, radius):
+        """
+        Get all objects (Items and NPCs) whose grid position is within radius of (center_x, center_y).
+        Uses the spatial buckets so only nearby cells are visited; small areas just scan everything.
+        """
+        radius_sq = radius * radius
+        ox, oy = self._ox, self._oy
+        if len(self.items) + len(self.npcs) < _SPATIAL_SCAN_THRESHOLD:
+            candidates = self.items + self.npcs
+        else:
+            candidates = []
+            buckets = self._buckets
+            min_bx, max_bx = int((center_x - radius) // _BUCKET_SIZE), int((center_x + radius) // _BUCKET_SIZE)
+            min_by, max_by = int((center_y - radius) // _BUCKET_SIZE), int((center_y + radius) // _BUCKET_SIZE)
+            for bx in range(min_bx, max_bx + 1):
+                for by in range(min_by, max_by + 1):
+                    bucket = buckets.get((bx, by))
+                    if bucket:
+                        candidates.extend(bucket)
+
+        nearby = []
+        for obj in candidates:
+            coords = obj.coordinates
+            if coords is None:
+                continue
+            dx = coords.x - ox - center_x
+            dy = coords.y - oy - center_y
+            if dx * dx + dy * dy <= radius_sq:
+                nearby.append(obj)
+        return nearby
+
+    def get_npcs_within(self, center_x, center_y, radius):
+        """Like get_objects_within, but only returns the NPCs."""
+        return [obj for obj in self.get_objects_within(center_x, center_y, radius) if obj._is_npc]
 
     def __str__(self):
         return f"{self.name} (Origin: {self.area_origin_coords}, Size: {self.grid_width}x{self.grid_length})"
 
+class _StaticKDTree:
+    """
+    Minimal 2D k-d tree over a fixed list of (x, y, payload) points.
+    It is never updated in place; build a new one when the points change.
+    """
+    def __init__(self, points):
+        self._root = self._build(list(points), 0)
+
+    def _build(self, points, depth):
+        if not points:
+            return None
+        axis = depth % 2
+        points.sort(key=itemgetter(axis))
+        mid = len(points) // 2
+        # Node layout: (point, split_axis, left_subtree, right_subtree)
+        return (points[mid], axis, self._build(points[:mid], depth + 1), self._build(points[mid + 1:], depth + 1))
+
+    def nearest(self, x, y):
+        """Return the payload of the point closest to (x, y), or None if the tree is empty."""
+        best_payload, best_dist_sq = None, float('inf')
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            point, axis, left, right = node
+            dx, dy = point[0] - x, point[1] - y
+            dist_sq = dx * dx + dy * dy
+            if dist_sq < best_dist_sq:
+                best_payload, best_dist_sq = point[2], dist_sq
+            diff = (x, y)[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # Only descend into the far side if the splitting line is closer than the best so far.
+            # The far side is pushed first so the near side is searched first.
+            if diff * diff < best_dist_sq:
+                stack.append(far)
+            stack.append(near)
+        return best_payload
+
+    def within_radius(self, x, y, radius):
+        """Return the payloads of all points within radius of (x, y)."""
+        found = []
+        radius_sq = radius * radius
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            point, axis, left, right = node
+            dx, dy = point[0] - x, point[1] - y
+            if dx * dx + dy * dy <= radius_sq:
+                found.append(point[2])
+            diff = (x, y)[axis] - point[axis]
+            if diff - radius <= 0:
+                stack.append(left)
+            if diff + radius >= 0:
+                stack.append(right)
+        return found
+
+
 class AreaGroup:
     """Manages a group of related areas, like a land complex."""
     def __init__(self, name, origin_coords=None):
@@ -153,82 +416,58 @@ class AreaGroup:
         - (x_offset, y_offset): Relative to group origin
         - {"from": "area_id", "direction": "north/south/east/west", "distance": 10}
         """
-        if area.id in self.areas:
-            print(f"Warning: Area with ID '{area.id}' already exists in group '{self.name}'. Overwriting.")
-        
-        self.areas[area.id] = area
-        
-        # Set area coordinates based on relative position
-        if relative_position is None:
-            # Default placement at group origin
-            area.area_origin_coords = Coordinates(
-                self.origin_coords.x,
-                self.origin_coords.y,
-                self.origin_coords.z
-            )
-        elif relative_position == "center":
-            # Place at group origin
-            area.area_origin_coords = Coordinates(
-                self.origin_coords.x,
-                self.origin_coords.y,
-                self.origin_coords.z
-            )
-        elif isinstance(relative_position, tuple) and len(relative_position) == 2:
-            # Place at offset from group origin
-            x_offset, y_offset = relative_position
-            area.area_origin_coords = Coordinates(
-                self.origin_coords.x + x_offset,
-                self.origin_coords.y + y_offset,
-                self.origin_coords.z
-            )
-        elif isinstance(relative_position, dict) and "from" in relative_position and "direction" in relative_position:
-            # Place relative to another area in the group
-            from_area_id = relative_position["from"]
-            direction = relative_position["direction"]
-            distance = relative_position.get("distance", 20)  # Default distance
-            
-            if from_area_id in self.areas:
-                from_area = self.areas[from_area_id]
-                
-                # Calculate new coordinates based on direction
-                if direction == "north":
-                    area.area_origin_coords = Coordinates(
-                        from_area.area_origin_coords.x,
-                        from_area.area_origin_coords.y - distance,
-                        from_area.area_origin_coords.z
-                    )
-                elif direction == "south":
-                    area.area_origin_coords = Coordinates(
-                        from_area.area_origin_coords.x,
-                        from_area.area_origin_coords.y + distance,
-                        from_area.area_origin_coords.z
-                    )
-                elif direction == "east":
-                    area.area_origin_coords = Coordinates(
-                        from_area.area_origin_coords.x + distance,
-                        from_area.area_origin_coords.y,
-                        from_area.area_origin_coords.z
-                    )
-                elif direction == "west":
-                    area.area_origin_coords = Coordinates(
-                        from_area.area_origin_coords.x - distance,
-                        from_area.area_origin_coords.y,
-                        from_area.area_origin_coords.z
-                    )
-            else:
-                print(f"Warning: Reference area '{from_area_id}' not found in group. Using group origin.")
-                area.area_origin_coords = Coordinates(
-                    self.origin_coords.x,
-                    self.origin_coords.y,
-                    self.origin_coords.z
-                )
-        
-        # Store the layout information
-        self.layout[area.id] = {
-            "area": area,
-            "relative_position": relative_position
-        }
-        
+        self.add_areas([(area, relative_position)])
+
+    def add_areas(self, specs):
+        """
+        Add several areas in one pass.
+        specs is an iterable of (area, relative_position) pairs, using the same
+        relative_position forms as add_area. Areas are placed in order, so a spec
+        may be positioned "from" an area added earlier in the same batch.
+        """
+        group_x, group_y, group_z = self.origin_coords.x, self.origin_coords.y, self.origin_coords.z
+        areas = self.areas
+        layout = self.layout
+
+        for area, relative_position in specs:
+            if area.id in areas:
+                print(f"Warning: Area with ID '{area.id}' already exists in group '{self.name}'. Overwriting.")
+
+            areas[area.id] = area
+
+            # Set area coordinates based on relative position
+            if relative_position is None or relative_position == "center":
+                # Default placement at group origin
+                area.area_origin_coords = Coordinates(group_x, group_y, group_z)
+            elif isinstance(relative_position, tuple) and len(relative_position) == 2:
+                # Place at offset from group origin
+                x_offset, y_offset = relative_position
+                area.area_origin_coords = Coordinates(group_x + x_offset, group_y + y_offset, group_z)
+            elif isinstance(relative_position, dict) and "from" in relative_position and "direction" in relative_position:
+                # Place relative to another area in the group
+                from_area_id = relative_position["from"]
+                distance = relative_position.get("distance", 20)  # Default distance
+                from_area = areas.get(from_area_id)
+
+                if from_area is not None:
+                    offset = _DIRECTION_OFFSETS.get(relative_position["direction"])
+                    if offset is not None:
+                        from_coords = from_area.area_origin_coords
+                        area.area_origin_coords = Coordinates(
+                            from_coords.x + offset[0] * distance,
+                            from_coords.y + offset[1] * distance,
+                            from_coords.z
+                        )
+                else:
+                    print(f"Warning: Reference area '{from_area_id}' not found in group. Using group origin.")
+                    area.area_origin_coords = Coordinates(group_x, group_y, group_z)
+
+            # Store the layout information
+            layout[area.id] = {
+                "area": area,
+                "relative_position": relative_position
+            }
+
     def connect_areas_in_group(self, area1_id, direction, area2_id):
         """Connect two areas within the group."""
         if area1_id in self.areas and area2_id in self.areas:
@@ -236,63 +475,267 @@ class AreaGroup:
             return True
         return False
     
+    def _layout_columns(self):
+        """
+        Snapshot the layout as parallel columns: (areas, xs, ys, widths, lengths).
+        Index i in every column refers to the i-th area in layout order.
+        """
+        areas = [area_data["area"] for area_data in self.layout.values()]
+        xs = [area._ox for area in areas]
+        ys = [area._oy for area in areas]
+        widths = [area.grid_width for area in areas]
+        lengths = [area.grid_length for area in areas]
+        return areas, xs, ys, widths, lengths
+
+    def _build_spatial_bins(self, xs, ys, widths, lengths):
+        """
+        Bucket layout indices into a coarse spatial hash keyed by (cell_x, cell_y).
+        Each area is inserted into every cell its bounding box touches once the box
+        is grown by the adjacency tolerance, so two areas close enough to connect
+        are guaranteed to share at least one cell.
+        Returns (bins, cell_size).
+        """
+        tolerance = _ADJACENCY_TOLERANCE
+        cell = max(widths + lengths + [0]) + tolerance
+        bins = {}
+        for index, (ox, oy, width, length) in enumerate(zip(xs, ys, widths, lengths)):
+            min_cx = (ox - tolerance) // cell
+            max_cx = (ox + width + tolerance) // cell
+            min_cy = (oy - tolerance) // cell
+            max_cy = (oy + length + tolerance) // cell
+            for cx in range(min_cx, max_cx + 1):
+                for cy in range(min_cy, max_cy + 1):
+                    bins.setdefault((cx, cy), []).append(index)
+        return bins, cell
+
+    @staticmethod
+    def _adjacent_directions(x1, y1, width1, length1, x2, y2, width2, length2):
+        """Return the directions (from area 1) in which area 2 counts as adjacent."""
+        tolerance = _ADJACENCY_TOLERANCE
+        directions = []
+        same_row = abs(y1 - y2) < tolerance
+        same_column = abs(x1 - x2) < tolerance
+        if same_row and abs(x1 + width1 - x2) < tolerance:
+            directions.append("east")
+        if same_row and abs(x1 - (x2 + width2)) < tolerance:
+            directions.append("west")
+        if same_column and abs(y1 - (y2 + length2)) < tolerance:
+            directions.append("north")
+        if same_column and abs(y1 + length1 - y2) < tolerance:
+            directions.append("south")
+        return directions
+
     def connect_all_adjacent_areas(self):
         """
         Automatically connect areas that are adjacent to each other.
         This is useful for creating a connected complex like a land.
+        Only areas sharing a spatial bin are compared, instead of every pair.
         """
-        # This is a simplified version - in a real implementation, you'd check
-        # actual adjacency based on coordinates and dimensions
-        for area1_id, area1_data in self.layout.items():
-            area1 = area1_data["area"]
-            for area2_id, area2_data in self.layout.items():
-                if area1_id == area2_id:
-                    continue
-                    
-                area2 = area2_data["area"]
-                
-                # Check if areas are adjacent (simplified)
-                # East-West adjacency
-                if (abs(area1.area_origin_coords.x + area1.grid_width - area2.area_origin_coords.x) < 5 and
-                    abs(area1.area_origin_coords.y - area2.area_origin_coords.y) < 5):
-                    area1.add_connection("east", area2)
-                
-                # West-East adjacency
-                if (abs(area1.area_origin_coords.x - (area2.area_origin_coords.x + area2.grid_width)) < 5 and
-                    abs(area1.area_origin_coords.y - area2.area_origin_coords.y) < 5):
-                    area1.add_connection("west", area2)
-                
-                # North-South adjacency
-                if (abs(area1.area_origin_coords.y - (area2.area_origin_coords.y + area2.grid_length)) < 5 and
-                    abs(area1.area_origin_coords.x - area2.area_origin_coords.x) < 5):
-                    area1.add_connection("north", area2)
-                
-                # South-North adjacency
-                if (abs(area1.area_origin_coords.y + area1.grid_length - area2.area_origin_coords.y) < 5 and
-                    abs(area1.area_origin_coords.x - area2.area_origin_coords.x) < 5):
-                    area1.add_connection("south", area2)
+        areas, xs, ys, widths, lengths = self._layout_columns()
+        bins, _ = self._build_spatial_bins(xs, ys, widths, lengths)
+
+        # Collect each candidate pair once, as layout indices
+        candidate_pairs = set()
+        for indices in bins.values():
+            if len(indices) < 2:
+                continue
+            for i, index1 in enumerate(indices):
+                for index2 in indices[i + 1:]:
+                    candidate_pairs.add((index1, index2) if index1 < index2 else (index2, index1))
+
+        # Test both orderings and apply them in layout order, so connections
+        # (and which side wins on overwrite) come out the same as a full pair scan
+        ordered_pairs = []
+        for index1, index2 in candidate_pairs:
+            ordered_pairs.append((index1, index2))
+            ordered_pairs.append((index2, index1))
+        ordered_pairs.sort()
+
+        adjacent_directions = self._adjacent_directions
+        for i, j in ordered_pairs:
+            directions = adjacent_directions(xs[i], ys[i], widths[i], lengths[i], xs[j], ys[j], widths[j], lengths[j])
+            for direction in directions:
+                areas[i].add_connection(direction, areas[j])
 
 class AreaManager:
     """Manages all areas in the game world."""
     def __init__(self):
         self.areas = {}  # area_id -> Area_object
         self.area_groups = {}  # group_name -> AreaGroup_object
+        self._name_index = {}  # area.name.lower() -> first Area_object with that name
+        self._lower_name_items = []  # (area.name.lower(), Area_object) in self.areas order
+        # list_areas display group -> [Area_object] kept sorted by name, plus the parallel name keys
+        self._grouped = defaultdict(list)
+        self._grouped_names = defaultdict(list)
+        self._group_order = None  # Sorted group names, recomputed when a new group appears
+        # Parallel columns of area bounds (x0s, y0s, x1s, y1s, areas), built lazily by _get_bounds_table
+        self._bounds_table = None
+        self._bounds_version = -1
+        # Static k-d tree over area centres; rebuilt on the next query after any add or move
+        self._kdtree = None
+        self._kdtree_version = -1
+        # Connection graph compiled to integer adjacency (CSR), built lazily by _build_csr
+        self._csr = None
+        self._csr_version = -1
 
     def add_area(self, area):
         """Add an area to the manager."""
         if area.id in self.areas:
             print(f"Warning: Area with ID '{area.id}' already exists. Overwriting.")
+            self.areas[area.id] = area
+            self._rebuild_indexes()
+            return
         self.areas[area.id] = area
+        self._index_area(area)
+
+    def _index_area(self, area):
+        """Add an area to the name lookups and display groups."""
+        lower_name = sys.intern(area.name.lower())
+        self._name_index.setdefault(lower_name, area)
+        self._lower_name_items.append((lower_name, area))
+        group_name = self._display_group_for(area)
+        if group_name not in self._grouped:
+            self._group_order = None
+        names = self._grouped_names[group_name]
+        position = bisect_right(names, area.name)
+        names.insert(position, area.name)
+        self._grouped[group_name].insert(position, area)
+        self._bounds_table = None
+        self._kdtree = None
+        self._csr = None
+
+    def _rebuild_indexes(self):
+        """Recompute the name lookups and display groups from self.areas."""
+        self._name_index = {}
+        self._lower_name_items = []
+        self._grouped = defaultdict(list)
+        self._grouped_names = defaultdict(list)
+        self._group_order = None
+        for area in self.areas.values():
+            self._index_area(area)
+
+    @staticmethod
+    def _display_group_for(area):
+        """Pick the heading list_areas shows an area under, based on its name."""
+        if " Land " in area.name:
+            return "Land Complex"
+        if "Disneyland" in area.name:
+            return "Disneyland"
+        if area.name in _MAIN_AREA_NAMES:
+            return "Main Areas"
+        return "Ungrouped"
 
     def get_area(self, area_id_or_name):
         """Get an area by its ID or case-insensitive name."""
-        if area_id_or_name in self.areas:
-            return self.areas[area_id_or_name]
-        for area in self.areas.values():
-            if area.name.lower() == area_id_or_name.lower():
-                return area
-        return None
+        area = self.areas.get(area_id_or_name)
+        if area is not None:
+            return area
+        return self._name_index.get(area_id_or_name.lower())
     
+    def _get_bounds_table(self):
+        """Return the area bounds as parallel lists, rebuilding them if an area was added or moved."""
+        if self._bounds_table is None or self._bounds_version != Area._geometry_version:
+            x0s, y0s, x1s, y1s, areas = [], [], [], [], []
+            for area in self.areas.values():
+                x0s.append(area._ox)
+                y0s.append(area._oy)
+                x1s.append(area._ox + area.grid_width)
+                y1s.append(area._oy + area.grid_length)
+                areas.append(area)
+            self._bounds_table = (x0s, y0s, x1s, y1s, areas)
+            self._bounds_version = Area._geometry_version
+        return self._bounds_table
+
+    def find_containing_area(self, global_x, global_y):
+        """
+        Find the area whose grid covers the given global (x, y) point.
+        When areas overlap (e.g. a Shop inside its Land) the smallest one wins.
+        Returns None if no area covers the point.
+        """
+        x0s, y0s, x1s, y1s, areas = self._get_bounds_table()
+        best_area, best_size = None, None
+        for x0, y0, x1, y1, area in zip(x0s, y0s, x1s, y1s, areas):
+            if x0 <= global_x < x1 and y0 <= global_y < y1:
+                size = (x1 - x0) * (y1 - y0)
+                if best_size is None or size < best_size:
+                    best_area, best_size = area, size
+        return best_area
+
+    def _get_spatial_index(self):
+        """Return the k-d tree over area centres, rebuilding it if an area was added or moved."""
+        if self._kdtree is None or self._kdtree_version != Area._geometry_version:
+            x0s, y0s, x1s, y1s, areas = self._get_bounds_table()
+            centres = [((x0 + x1) / 2, (y0 + y1) / 2, area) for x0, y0, x1, y1, area in zip(x0s, y0s, x1s, y1s, areas)]
+            self._kdtree = _StaticKDTree(centres)
+            self._kdtree_version = Area._geometry_version
+        return self._kdtree
+
+    def find_nearest_area(self, global_x, global_y):
+        """Find the area whose centre is closest to the given global (x, y) point, or None if there are no areas."""
+        return self._get_spatial_index().nearest(global_x, global_y)
+
+    def find_areas_in_radius(self, global_x, global_y, radius):
+        """Find all areas whose centres lie within radius of the given global (x, y) point."""
+        return self._get_spatial_index().within_radius(global_x, global_y, radius)
+
+    def _build_csr(self):
+        """
+        Compile area connections into compressed sparse row form:
+        (area_list, index_of, indptr, indices), where the neighbours of area i are
+        indices[indptr[i]:indptr[i + 1]]. Connections to unregistered areas are skipped.
+        """
+        if self._csr is None or self._csr_version != Area._connections_version:
+            area_list = list(self.areas.values())
+            index_of = {area: i for i, area in enumerate(area_list)}
+            indptr = [0]
+            indices = []
+            for area in area_list:
+                for target in area.connections.values():
+                    target_index = index_of.get(target)
+                    if target_index is not None:
+                        indices.append(target_index)
+                indptr.append(len(indices))
+            self._csr = (area_list, index_of, indptr, indices)
+            self._csr_version = Area._connections_version
+        return self._csr
+
+    def neighbors(self, index):
+        """Return the CSR indices of the areas directly connected to the area at index."""
+        _, _, indptr, indices = self._build_csr()
+        return indices[indptr[index]:indptr[index + 1]]
+
+    def find_path(self, src_id, dst_id):
+        """
+        Find the shortest chain of connections between two areas (by ID or name).
+        Returns the list of area IDs from src to dst inclusive, or None if either
+        area is unknown or dst can't be reached.
+        """
+        src = self.get_area(src_id)
+        dst = self.get_area(dst_id)
+        if src is None or dst is None:
+            return None
+
+        area_list, index_of, indptr, indices = self._build_csr()
+        start, goal = index_of[src], index_of[dst]
+        prev = [-1] * len(area_list)
+        prev[start] = start
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            if current == goal:
+                break
+            for neighbor in indices[indptr[current]:indptr[current + 1]]:
+                if prev[neighbor] == -1:
+                    prev[neighbor] = current
+                    queue.append(neighbor)
+
+        if prev[goal] == -1:
+            return None
+        path = [goal]
+        while path[-1] != start:
+            path.append(prev[path[-1]])
+        return [area_list[i].id for i in reversed(path)]
+
     def get_area_by_id(self, area_id):
         """Get an area by its exact ID."""
         return self.areas.get(area_id)
@@ -302,12 +745,8 @@ class AreaManager:
         if not search_term:
             return []
         
-        found_areas = []
         search_term_lower = search_term.lower()
-        for area_obj in self.areas.values():
-            if search_term_lower in area_obj.name.lower():
-                found_areas.append(area_obj)
-        return found_areas
+        return [area_obj for lower_name, area_obj in self._lower_name_items if search_term_lower in lower_name]
 
     def connect_areas(self, area1_id, direction, area2_id):
         """Connect two areas in the specified direction."""
@@ -343,57 +782,53 @@ class AreaManager:
         
     def list_areas(self, include_connections=True, include_coords=True):
         """List all areas including their IDs and optionally connections."""
-        print("\n=== GAME AREAS ===")
-        print(f"Total areas: {len(self.areas)}")
-        
-        # Group areas by complex/group
-        area_groups = {}
-        for area in self.areas.values():
-            # Extract group name from area name if possible
-            group_name = "Ungrouped"
-            if " Land " in area.name:
-                group_name = "Land Complex"
-            elif "Disneyland" in area.name:
-                group_name = "Disneyland"
-            elif area.name in ["Main Street U.S.A.", "Adventureland", "Fantasyland"]:
-                group_name = "Main Areas"
-                
-            if group_name not in area_groups:
-                area_groups[group_name] = []
-            area_groups[group_name].append(area)
-        
-        # Print areas by group
-        for group_name, areas in sorted(area_groups.items()):
-            print(f"\n{group_name} ({len(areas)} areas):")
-            for area in sorted(areas, key=lambda a: a.name):
-                print(f"  ID: {area.id}, Name: {area.name}")
+        # Build the whole listing first and print it once
+        out = io.StringIO()
+        write = out.write
+        write("\n=== GAME AREAS ===\n")
+        write(f"Total areas: {len(self.areas)}\n")
+
+        if self._group_order is None:
+            self._group_order = sorted(self._grouped)
+
+        # Print areas by group (groups and name order are kept up to date in add_area)
+        for group_name in self._group_order:
+            areas = self._grouped[group_name]
+            write(f"\n{group_name} ({len(areas)} areas):\n")
+            for area in areas:
+                write(f"  ID: {area.id}, Name: {area.name}\n")
                 if include_coords:
-                    print(f"    Coordinates: {area.area_origin_coords}")
+                    write(f"    Coordinates: {area.area_origin_coords}\n")
                 if include_connections:
-                    connections = [f"{dir}: {conn.name}" for dir, conn in area.connections.items()]
-                    if connections:
-                        print(f"    Connections: {', '.join(connections)}")
+                    if area.connections:
+                        connections = [f"{dir}: {conn.name}" for dir, conn in area.connections.items()]
+                        write(f"    Connections: {', '.join(connections)}\n")
                     else:
-                        print("    Connections: None")
-        print("\n=== END OF AREAS ===\n")
+                        write("    Connections: None\n")
+        write("\n=== END OF AREAS ===\n")
+        print(out.getvalue())
 
 
 class Land(Area):
     """Represents a major themed land in Disneyland, which can contain other areas."""
+    _id_prefix = "land"
+    __slots__ = ()
+
     def __init__(self, name, description, area_origin_coords=None, grid_width=20, grid_length=20):
         super().__init__(name, description, area_origin_coords, grid_width, grid_length, parent_area=None)
         # Lands typically don't have parents themselves in this model
-        self.id = f"land_{name.lower().replace(' ', '_').replace('.', '')}"
 
 
 class Ride(Area):
     """Represents a ride or attraction. Can be a sub-area of a Land."""
+    _id_prefix = "ride"
+    __slots__ = ('ride_type', 'is_operational', 'suspicion_reduction_on_ride')
+
     def __init__(self, name, description, area_origin_coords=None, grid_width=5, grid_length=10, parent_area=None, ride_type="Unknown"):
         super().__init__(name, description, area_origin_coords, grid_width, grid_length, parent_area)
         self.ride_type = ride_type
         self.is_operational = True # By default
         self.suspicion_reduction_on_ride = 5 # Default suspicion reduction
-        self.id = f"ride_{name.lower().replace(' ', '_').replace('.', '')}"
         # Could add queue_time, capacity, etc. later
 
     def experience_ride(self, player):
@@ -409,62 +844,90 @@ class Ride(Area):
 
 class Shop(Area):
     """Represents a shop where items can be bought or sold. Can be a sub-area of a Land."""
+    _id_prefix = "shop"
+    __slots__ = ('shop_sells_stock', 'shop_buys_stock', '_sell_listing_cache', '_buy_listing_cache')
+
     def __init__(self, name, description, area_origin_coords=None, grid_width=5, grid_length=5, parent_area=None):
         super().__init__(name, description, area_origin_coords, grid_width, grid_length, parent_area)
         self.is_shop = True # Mark this area as a shop
         # For items the shop sells to the player: item_name.lower() -> {'prototype': Item_instance, 'price': float, 'stock': int}
         self.shop_sells_stock = {}
-        # For items the shop buys from the player: item_name.lower() -> {'buy_price': float, 'desired_stock': int, 'current_stock': int}
+        # For items the shop buys from the player: item_name.lower() -> {'buy_price': float, 'desired_stock': int, 'current_stock': int, 'needed': int}
         self.shop_buys_stock = {}
-        self.id = f"shop_{name.lower().replace(' ', '_').replace('.', '').replace(chr(39), '')}"
+        # Formatted listings, rebuilt only after the matching stock changes
+        self._sell_listing_cache = None
+        self._buy_listing_cache = None
 
     def add_item_to_sell_stock(self, item_prototype, price, quantity):
         """Adds an item type to the shop's for-sale stock."""
-        self.shop_sells_stock[item_prototype.name.lower()] = {
+        self.shop_sells_stock[sys.intern(item_prototype.name.lower())] = {
             'prototype': item_prototype,
             'price': price,
             'stock': quantity
         }
+        self._sell_listing_cache = None
 
     def add_item_to_buy_stock(self, item_name, buy_price, desired_stock=10):
         """Adds an item type that the shop is willing to buy from the player."""
-        self.shop_buys_stock[item_name.lower()] = {
+        self.shop_buys_stock[sys.intern(item_name.lower())] = {
             'buy_price': buy_price,
             'current_stock': 0, # How many the shop has bought
-            'desired_stock': desired_stock
+            'desired_stock': desired_stock,
+            'needed': desired_stock # desired_stock - current_stock, kept up to date by record_player_sale
         }
+        self._buy_listing_cache = None
+
+    def record_player_sale(self, item_name):
+        """Records that the shop bought one of item_name from the player."""
+        details = self.shop_buys_stock[item_name.lower()]
+        details['current_stock'] += 1
+        details['needed'] -= 1
+        self._buy_listing_cache = None
 
     def get_shop_sell_listing(self, **kwargs): # Added kwargs for potential future use by subclasses
         """Returns a list of strings describing items for sale by the shop."""
-        if not self.shop_sells_stock: return []
+        if self._sell_listing_cache is not None:
+            return self._sell_listing_cache
+        if not self.shop_sells_stock:
+            self._sell_listing_cache = []
+            return self._sell_listing_cache
         listing = ["Items for sale:"]
         for name_key, details in self.shop_sells_stock.items():
-            stock_info = "Unlimited" if details['stock'] == float('inf') else str(details['stock'])
-            listing.append(f"  - {details['prototype'].name}: ${details['price']:.2f} (Stock: {stock_info})")
+            stock = details['stock']
+            stock_info = "Unlimited" if stock == _INF else str(stock)
+            item_name = details['prototype'].name
+            listing.append(f"  - {item_name}: ${details['price']:.2f} (Stock: {stock_info})")
         if not listing[1:]: # Only header was added
-            return []
+            listing = []
+        self._sell_listing_cache = listing
         return listing
 
     def get_shop_buy_listing(self):
         """Returns a list of strings describing items the shop wants to buy."""
-        if not self.shop_buys_stock: return []
+        if self._buy_listing_cache is not None:
+            return self._buy_listing_cache
+        if not self.shop_buys_stock:
+            self._buy_listing_cache = []
+            return self._buy_listing_cache
         listing = ["Items we are buying:"]
         for name_key, details in self.shop_buys_stock.items():
             proper_name = name_key.title()
-            needed = details['desired_stock'] - details['current_stock']
+            needed = details['needed']
             if needed > 0:
                 listing.append(f"  - {proper_name}: We'll pay ${details['buy_price']:.2f} (Want: {needed})")
+        self._buy_listing_cache = listing
         return listing
 
     def process_player_purchase(self, item_name_query, player_money, item_manager):
         """Processes a player buying an item from the shop."""
         item_details = self.shop_sells_stock.get(item_name_query.lower())
         if not item_details: return None, 0, "not_found"
-        if item_details['stock'] <= 0 and item_details['stock'] != float('inf'): return None, 0, "out_of_stock"
+        if item_details['stock'] <= 0 and item_details['stock'] != _INF: return None, 0, "out_of_stock"
         if player_money < item_details['price']: return None, 0, "cannot_afford"
 
-        if item_details['stock'] != float('inf'):
+        if item_details['stock'] != _INF:
             item_details['stock'] -= 1
+            self._sell_listing_cache = None
         
         new_item_instance = item_manager.create_instance(item_details['prototype'].name)
         if not new_item_instance:
@@ -475,10 +938,13 @@ class Shop(Area):
 
 class FenceShop(Shop):
     """A special shop that only buys unpaid items from the player at a low price."""
+    _id_prefix = "fenceshop"
+    __slots__ = ('fence_cut',)
+    is_fence_shop = True
+
     def __init__(self, name, description, area_origin_coords=None, grid_width=3, grid_length=3, parent_area=None, fence_cut=0.25):
         super().__init__(name, description, area_origin_coords, grid_width, grid_length, parent_area)
         self.fence_cut = fence_cut # The percentage of item's value the fence offers
-        self.id = f"fenceshop_{name.lower().replace(' ', '_').replace('.', '').replace(chr(39), '')}"
         # FenceShops don't have regular sell stock or buy stock in the traditional sense.
         self.shop_sells_stock = {} # They don't sell anything
         self.shop_buys_stock = {}  # This will be dynamically determined
@@ -488,17 +954,14 @@ class FenceShop(Shop):
         if player_inventory is None:
             return ["The fence eyes you suspiciously. 'Whatcha got?'"]
 
-        listing = ["The fence looks over your goods... 'I might be interested in these...'"]
-        found_items = False
-        for item in player_inventory:
-            if item.is_unpaid:
-                buy_price = round(item.value * self.fence_cut)
-                listing.append(f"  - {item.name} (stolen): We'll give ya ${buy_price:.2f}")
-                found_items = True
-        
-        if not found_items:
+        cut = self.fence_cut
+        offers = [
+            f"  - {item.name} (stolen): We'll give ya ${round(item.value * cut):.2f}"
+            for item in player_inventory if item.is_unpaid
+        ]
+        if not offers:
             return ["'Got nothin' I want from you right now,' the fence grunts."]
-        return listing
+        return ["The fence looks over your goods... 'I might be interested in these...'"] + offers
 
     # Note: The actual selling logic will primarily be handled in Player.sell_item
     # when interacting with a FenceShop, as it needs access to player's inventory
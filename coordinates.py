@@ -5,6 +5,8 @@ Handles position and location in the 3D game world.
 
 class Coordinates:
     """Represents a position in the 3D game world."""
+    __slots__ = ('x', 'y', 'z')
+
     def __init__(self, x=0, y=0, z=0):
         self.x = x  # East-West position
         self.y = y  # North-South position
@@ -17,6 +19,12 @@ class Coordinates:
         """Calculate horizontal distance to another coordinate."""
         return ((self.x - other_coords.x) ** 2 + (self.y - other_coords.y) ** 2) ** 0.5
     
+    def distance_to_sq(self, other_coords):
+        """Squared horizontal distance to another coordinate; cheaper when only comparing distances."""
+        dx = self.x - other_coords.x
+        dy = self.y - other_coords.y
+        return dx * dx + dy * dy
+
     def height_difference(self, other_coords):
         """Calculate vertical distance to another coordinate."""
         return abs(self.z - other_coords.z)
@@ -2,111 +2,201 @@
 Game Manager module for the Disneyland Adventure game.
 Handles game state, setup, and command processing.
 """
+import io
+import pickle
 import random
 import sys
+from contextlib import redirect_stdout
 
 from .player import Player
-from .area import Area, AreaManager, Land, Ride, Shop # Import new classes
-from .area import FenceShop # Import FenceShop
-from .item import Item, ItemManager
-from .npc import NPC, NPCManager, ParkCharacter, Guest, CastMember # Import new NPC types
-from .npc import ShadyCharacter # Import ShadyCharacter
-from .coordinates import Coordinates
-
-class OutputMonitor:
-    """Monitors stdout to see if any actual text is written."""
-    def __init__(self, original_stdout):
-        self.original_stdout = original_stdout
-        self.texts_buffer = []
-
-    def write(self, text):
-        stripped_text = text.strip()
-        if stripped_text:
-            self.texts_buffer.append(stripped_text)
-        return self.original_stdout.write(text)
-
-    def flush(self):
-        return self.original_stdout.flush()
-
-    def get_buffered_texts_and_reset(self):
-        texts = list(self.texts_buffer)
-        self.texts_buffer.clear()
-        return texts
+from .area import AreaManager, Ride # Ride is checked by the 'ride' command
+from .item import ItemManager
+from .npc import NPCManager
+# Classes only needed to build the world are imported in _build_world
+
+# Movement words accepted as commands (short and long forms) -> the full direction each one means
+_DIRECTIONS = {
+    "n": "north", "north": "north", "s": "south", "south": "south",
+    "e": "east", "east": "east", "w": "west", "west": "west",
+}
+
+# Flavour text printed on turns where nothing else produced any output
+_AMBIENT_NO_EVENT_MESSAGES = (
+    "The magical air of Disneyland hums around you.",
+    "You hear the distant laughter of children.",
+    "A gentle breeze rustles the leaves on a nearby tree.",
+    "Time passes peacefully.",
+)
+
+# Stored in world cache files; bump it whenever _build_world changes so older caches are rebuilt
+_WORLD_CACHE_VERSION = 6
+
+class TickScheduler:
+    """Runs the per-turn world systems, each one every `period` turns."""
+    def __init__(self):
+        self._systems = [] # (callback, period) pairs, run in registration order
+
+    def register(self, callback, period=1):
+        """Call callback(period) on every turn that is a multiple of period."""
+        if period < 1:
+            raise ValueError(f"period must be at least 1 turn, got {period}")
+        self._systems.append((callback, period))
+
+    def tick(self, game_turn):
+        for callback, period in self._systems:
+            if game_turn % period == 0:
+                callback(period) # Tells the system how many turns it is catching up on
 
 class GameManager:
     """Manages the overall game state and systems."""
-    def __init__(self):
-        self.player = Player(name="Guest", start_money=50)
+    # Printed in one call by the "help" command
+    _HELP_TEXT = (
+        "\nAvailable commands:\n"
+        "  n, s, e, w (or north, south, east, west) - Move\n"
+        "  enter <place_name> - Use a named entrance (e.g., 'enter emporium')\n"
+        "  exit to <place_name> - Use a named exit (e.g., 'exit to main street')\n"
+        "  look (l)          - Look around the area\n"
+        "  inventory (i, bag)- Check your bag and money\n"
+        "  get <item_name>   - Pick up an item\n"
+        "  drop <item_name>  - Drop an item\n"
+        "  buy <item_name>   - Buy an item from a shop\n"
+        "  sell <item_name>  - Sell an item to a shop\n"
+        "  ride              - Experience the ride you are currently in (e.g., a ride queue)\n"
+        "  teleport (tp) <area_name> [x] [y] - Fast travel\n"
+        "  where <place_name> - Find the global coordinates of a place\n"
+        "  whereami          - Show your current location details\n"
+        "  quit (exit)       - Exit the game"
+    )
+
+    def __init__(self, world_cache_path=None):
+        # Optional pickle of the freshly built world; later runs load it instead of rebuilding
+        self.world_cache_path = world_cache_path
         self.area_manager = AreaManager()
+        self.player = Player(name="Guest", start_money=50, area_manager=self.area_manager)
         self.item_manager = ItemManager()
         self.npc_manager = NPCManager()
         self.running = True
         self.game_turn = 0
-        self._AMBIENT_NO_EVENT_MESSAGES = [
-            "The magical air of Disneyland hums around you.",
-            "You hear the distant laughter of children.",
-            "A gentle breeze rustles the leaves on a nearby tree.",
-            "Time passes peacefully.",
-        ]
+        self._commands = self._build_command_table() # action word -> handler(args)
+        self._rng = random.Random() # Dedicated generator for flavour text
+        # Systems that advance once per turn; slower ones can be given a longer period.
+        # Suspicion decay prints before the NPC messages, as it always has
+        self.scheduler = TickScheduler()
+        self.scheduler.register(self.player.update_suspicion_decay, period=1)
+        self.scheduler.register(self._update_npcs, period=1)
 
     def initialize_game(self):
         print("Warming up the magic of Disneyland...")
+        if not (self.world_cache_path and self._load_world_cache()):
+            self._build_world()
+            if self.world_cache_path:
+                self._save_world_cache()
+
+        # Place Player
+        self.player.set_current_area(self.area_manager.get_area("Main Street U.S.A."), 1, 1)
+
+        print("The gates are open! Welcome to Disneyland!")
+        # self.player.look_around() # set_current_area calls look_around
+
+    def _load_world_cache(self):
+        """Restore the managers from world_cache_path. Returns False if there is no usable cache."""
+        try:
+            with open(self.world_cache_path, "rb") as cache_file:
+                cached = pickle.load(cache_file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return False
+        if not isinstance(cached, dict) or cached.get("version") != _WORLD_CACHE_VERSION:
+            return False
+
+        self.area_manager, self.item_manager, self.npc_manager = cached["managers"]
+        self.area_manager._rebuild_indexes() # Drops lookup caches tied to the process that saved them
+        self.item_manager.resume_item_ids()
+        self.npc_manager.resume_after_load()
+        self.player.area_manager = self.area_manager
+        return True
+
+    def _save_world_cache(self):
+        """Pickle the freshly built world to world_cache_path."""
+        cached = {
+            "version": _WORLD_CACHE_VERSION,
+            "managers": (self.area_manager, self.item_manager, self.npc_manager),
+        }
+        try:
+            with open(self.world_cache_path, "wb") as cache_file:
+                pickle.dump(cached, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print(f"Warning: Could not save the world cache to '{self.world_cache_path}': {e}")
+
+    def _build_world(self):
+        """Create the items, areas, connections and NPCs that make up the park."""
+        from .area import Land, Shop, FenceShop
+        from .item import Item
+        from .npc import ParkCharacter, CastMember, ShadyCharacter
+        from .coordinates import Coordinates
+
+        # Local aliases for the managers used throughout setup
+        item_manager = self.item_manager
+        area_manager = self.area_manager
+        npc_manager = self.npc_manager
 
         # Create Item Prototypes
         mickey_ears = Item(name="Mickey Ears", description="Classic Mickey Mouse ears.", value=15)
-        self.item_manager.add_prototype(mickey_ears)
+        item_manager.add_prototype(mickey_ears)
         churro = Item(name="Churro", description="A delicious cinnamon sugar treat.", value=5)
-        self.item_manager.add_prototype(churro)
+        item_manager.add_prototype(churro)
         lost_map = Item(name="Lost Map", description="A slightly crumpled park map.", value=1, pickupable=True) # Low value, just for example
-        self.item_manager.add_prototype(lost_map)
+        item_manager.add_prototype(lost_map)
+        prototypes = item_manager.item_prototypes
 
         # --- Create Lands ---
         main_street_land = Land(name="Main Street U.S.A.", description="A charming turn-of-the-century American town square.", grid_width=15, grid_length=5)
-        self.area_manager.add_area(main_street_land)
+        area_manager.add_area(main_street_land)
 
         adventureland = Land(name="Adventureland", description="An exotic land of jungles, rivers, and mystery.", grid_width=20, grid_length=15)
-        self.area_manager.add_area(adventureland)
+        area_manager.add_area(adventureland)
 
         fantasyland = Land(name="Fantasyland", description="A whimsical land of fairy tales and dreams.", grid_width=18, grid_length=18)
-        self.area_manager.add_area(fantasyland)
+        area_manager.add_area(fantasyland)
 
         # --- Create Shops and Rides within Lands ---
 
         # Main Street Shops
         emporium = Shop(name="Emporium", description="The largest gift shop on Main Street, full of souvenirs.", parent_area=main_street_land, grid_width=6, grid_length=4)
         # Position Emporium within Main Street's conceptual space (global coords)
-        emporium.area_origin_coords = Coordinates(main_street_land.area_origin_coords.x + 2, main_street_land.area_origin_coords.y + 0)
-        emporium.add_item_to_sell_stock(self.item_manager.item_prototypes["mickey ears"], price=15, quantity=20)
-        emporium.add_item_to_sell_stock(self.item_manager.item_prototypes["churro"], price=6, quantity=30) # Slightly more expensive here
+        main_street_origin = main_street_land.area_origin_coords
+        emporium.area_origin_coords = Coordinates(main_street_origin.x + 2, main_street_origin.y + 0)
+        emporium.add_item_to_sell_stock(prototypes["mickey ears"], price=15, quantity=20)
+        emporium.add_item_to_sell_stock(prototypes["churro"], price=6, quantity=30) # Slightly more expensive here
         emporium.add_item_to_buy_stock("Lost Map", buy_price=0.50, desired_stock=3)
-        self.area_manager.add_area(emporium)
+        area_manager.add_area(emporium)
         main_street_land.add_sub_area(emporium) # Link it as a sub_area
 
         # Adventureland Rides & Shops
+        adventureland_origin = adventureland.area_origin_coords
         jungle_cruise_queue = Ride(name="Jungle Cruise Queue", description="The winding queue for the world-famous Jungle Cruise.", parent_area=adventureland, ride_type="Boat Ride", grid_width=3, grid_length=8)
-        jungle_cruise_queue.area_origin_coords = Coordinates(adventureland.area_origin_coords.x + 5, adventureland.area_origin_coords.y + 2)
+        jungle_cruise_queue.area_origin_coords = Coordinates(adventureland_origin.x + 5, adventureland_origin.y + 2)
         jungle_cruise_queue.suspicion_reduction_on_ride = 7 # Specific value for this ride
-        self.area_manager.add_area(jungle_cruise_queue)
+        area_manager.add_area(jungle_cruise_queue)
         adventureland.add_sub_area(jungle_cruise_queue)
 
         adventure_bazaar = Shop(name="Adventureland Bazaar", description="A marketplace full of exotic treasures.", parent_area=adventureland, grid_width=4, grid_length=4)
-        adventure_bazaar.area_origin_coords = Coordinates(adventureland.area_origin_coords.x + 1, adventureland.area_origin_coords.y + 10)
-        adventure_bazaar.add_item_to_sell_stock(self.item_manager.item_prototypes["lost map"], price=2, quantity=10) # They sell maps!
-        self.area_manager.add_area(adventure_bazaar)
+        adventure_bazaar.area_origin_coords = Coordinates(adventureland_origin.x + 1, adventureland_origin.y + 10)
+        adventure_bazaar.add_item_to_sell_stock(prototypes["lost map"], price=2, quantity=10) # They sell maps!
+        area_manager.add_area(adventure_bazaar)
         adventureland.add_sub_area(adventure_bazaar)
 
         # Add a FenceShop and a ShadyCharacter
         hidden_alley = FenceShop(name="Hidden Alley", description="A dark, out-of-the-way alley. Smells faintly of desperation.", parent_area=adventureland, fence_cut=0.3)
-        hidden_alley.area_origin_coords = Coordinates(adventureland.area_origin_coords.x + 18, adventureland.area_origin_coords.y + 1) # Tucked away
-        self.area_manager.add_area(hidden_alley)
+        hidden_alley.area_origin_coords = Coordinates(adventureland_origin.x + 18, adventureland_origin.y + 1) # Tucked away
+        area_manager.add_area(hidden_alley)
         adventureland.add_sub_area(hidden_alley) # It's "in" Adventureland
         shady_sam = ShadyCharacter(name="Shady Sam", description="A nervous-looking individual who keeps glancing over his shoulder.")
         shady_sam.set_location(hidden_alley, 1, 1) # Placed within the alley
-        self.npc_manager.add_npc(shady_sam)
+        npc_manager.add_npc(shady_sam)
 
         # --- Connect Lands and Sub-Areas ---
-        self.area_manager.connect_areas(main_street_land.id, "north", fantasyland.id) # Main Street path leads to Fantasyland path
-        self.area_manager.connect_areas(main_street_land.id, "west", adventureland.id) # Main Street path leads to Adventureland path
+        area_manager.connect_areas(main_street_land.id, "north", fantasyland.id) # Main Street path leads to Fantasyland path
+        area_manager.connect_areas(main_street_land.id, "west", adventureland.id) # Main Street path leads to Adventureland path
         
         # Connections for entering/exiting sub-areas (shops, rides)
         # These are conceptual "doors" or transition points.
@@ -118,11 +208,11 @@ class GameManager:
         # Assuming (2,0) on Main Street is the "door" to Emporium.
         # Player will appear at Emporium's (3,0) [width/2, 0].
         main_street_land.add_portal(from_gx=2, from_gy=0, 
-                                    target_area=emporium, 
+                                    target_area_id=emporium.id, 
                                     target_gx=emporium.grid_width // 2, target_gy=0)
         # Portal from Emporium (e.g., grid 3,0) back to Main Street (at 2,0)
         emporium.add_portal(from_gx=emporium.grid_width // 2, from_gy=0,
-                            target_area=main_street_land, target_gx=2, target_gy=0)
+                            target_area_id=main_street_land.id, target_gx=2, target_gy=0)
         emporium.add_connection("exit to main street", main_street_land)
 
         # Adventureland <-> Jungle Cruise Queue
@@ -137,174 +227,216 @@ class GameManager:
         adventureland.add_connection("enter alley", hidden_alley)
         hidden_alley.add_connection("exit to adventureland", adventureland)
         # Example portal for Hidden Alley if desired:
-        # adventureland.add_portal(from_gx=17, from_gy=1, target_area=hidden_alley, target_gx=hidden_alley.grid_width//2, target_gy=hidden_alley.grid_length-1) # Enter at top of alley
-        # hidden_alley.add_portal(from_gx=hidden_alley.grid_width//2, from_gy=hidden_alley.grid_length-1, target_area=adventureland, target_gx=17, target_gy=1)
+        # adventureland.add_portal(from_gx=17, from_gy=1, target_area_id=hidden_alley.id, target_gx=hidden_alley.grid_width//2, target_gy=hidden_alley.grid_length-1) # Enter at top of alley
+        # hidden_alley.add_portal(from_gx=hidden_alley.grid_width//2, from_gy=hidden_alley.grid_length-1, target_area_id=adventureland.id, target_gx=17, target_gy=1)
 
         # Example portal for Jungle Cruise Queue:
         # Adventureland grid: width=20, length=15. Jungle Cruise Queue grid: width=3, length=8.
         # If entrance on Adventureland is at (4,2) leading to JCQ's (1,7) (bottom-center of queue)
-        # adventureland.add_portal(from_gx=4, from_gy=2, target_area=jungle_cruise_queue, target_gx=jungle_cruise_queue.grid_width//2, target_gy=jungle_cruise_queue.grid_length-1)
-        # jungle_cruise_queue.add_portal(from_gx=jungle_cruise_queue.grid_width//2, from_gy=jungle_cruise_queue.grid_length-1, target_area=adventureland, target_gx=4, target_gy=2)
+        # adventureland.add_portal(from_gx=4, from_gy=2, target_area_id=jungle_cruise_queue.id, target_gx=jungle_cruise_queue.grid_width//2, target_gy=jungle_cruise_queue.grid_length-1)
+        # jungle_cruise_queue.add_portal(from_gx=jungle_cruise_queue.grid_width//2, from_gy=jungle_cruise_queue.grid_length-1, target_area_id=adventureland.id, target_gx=4, target_gy=2)
 
 
         # Place some items in the world
-        map_instance = self.item_manager.create_instance("Lost Map")
+        map_instance = item_manager.create_instance("Lost Map")
         if map_instance: # create_instance returns the item
             adventureland.add_object_to_grid(map_instance, 10, 10) # Lost map in Adventureland
 
         # Create NPCs
         mickey = ParkCharacter(name="Mickey Mouse", description="The one and only, cheerful and friendly!", signature_move="gives a friendly wave and a chuckle")
         mickey.set_location(main_street_land, 7, 2) 
-        self.npc_manager.add_npc(mickey)
+        npc_manager.add_npc(mickey)
 
         goofy = ParkCharacter(name="Goofy", description="A lovable and clumsy friend.", signature_move="stumbles a bit but recovers with a 'Gawrsh!'")
         goofy.set_location(fantasyland, 5, 5)
-        self.npc_manager.add_npc(goofy)
+        npc_manager.add_npc(goofy)
 
         # Add Cast Members to the Emporium
         cm_alice = CastMember(name="Alice", description="A helpful Cast Member at the till.", role="Cashier")
         cm_alice.set_location(emporium, 1, 1) # Near a till
-        self.npc_manager.add_npc(cm_alice)
+        npc_manager.add_npc(cm_alice)
 
         cm_bob = CastMember(name="Bob", description="A vigilant Cast Member keeping an eye on the displays.", role="Floor Staff")
         cm_bob.set_location(emporium, 4, 2) # Roaming the floor
-        self.npc_manager.add_npc(cm_bob)
-
-        # Place Player
-        self.player.set_current_area(main_street_land, 1, 1)
-
-        print("The gates are open! Welcome to Disneyland!")
-        # self.player.look_around() # set_current_area calls look_around
+        npc_manager.add_npc(cm_bob)
+
+    def _build_command_table(self):
+        """Map each command word (and its aliases) to the method that handles it."""
+        return {
+            "enter": self._cmd_enter,
+            "exit": self._cmd_exit,
+            "look": self._cmd_look, "l": self._cmd_look,
+            "inventory": self._cmd_inventory, "i": self._cmd_inventory, "bag": self._cmd_inventory,
+            "get": self._cmd_get, "take": self._cmd_get, "pickup": self._cmd_get,
+            "drop": self._cmd_drop,
+            "buy": self._cmd_buy,
+            "sell": self._cmd_sell,
+            "ride": self._cmd_ride,
+            "teleport": self._cmd_teleport, "tp": self._cmd_teleport,
+            "whereami": self._cmd_whereami,
+            "quit": self._cmd_quit,
+            "where": self._cmd_where,
+        }
 
     def process_command(self, command_input):
         parts = command_input.lower().split()
         if not parts: return
 
         action = parts[0]
-        args = parts[1:]
-        target_name = " ".join(args)
+        args = parts[1:] # Handlers that need the joined target name build it themselves
+
+        direction = _DIRECTIONS.get(action)
+        if direction:
+            self.player.move(direction)
+            return
 
-        if action in ["n", "north", "s", "south", "e", "east", "w", "west"]:
-            direction_map = {"n": "north", "s": "south", "e": "east", "w": "west"}
-            self.player.move(direction_map.get(action, action))
+        handler = self._commands.get(action)
+        if handler:
+            handler(args)
+        else:
+            self._cmd_unknown(args)
+
+    def _cmd_unknown(self, args):
+        print(f"Command not understood. Try 'help' for commands.")
+
+    def _cmd_enter(self, args):
         # Allow moving into sub-areas by name (simple version)
-        elif action == "enter" and args:
-            target_sub_area_name = " ".join(args)
-            # Try to match a connection key like "enter <target_sub_area_name>"
-            potential_connection_key = f"enter {target_sub_area_name.lower()}"
-            if self.player.current_area and potential_connection_key in self.player.current_area.connections:
-                self.player.move(potential_connection_key)
-            else:
-                print(f"You can't seem to enter '{target_sub_area_name}' from here.")
-        # Allow exiting sub-areas by name (e.g. "exit to main street")
-        elif action == "exit" and args:
-            full_exit_command = " ".join(parts).lower() # e.g. "exit to main street"
-            if self.player.current_area and full_exit_command in self.player.current_area.connections:
-                self.player.move(full_exit_command)
-            else:
-                print(f"You can't seem to exit via '{' '.join(args)}' from here. Try 'look' for exit descriptions or walk to an exit portal.")
-        elif action == "look" or action == "l":
-            self.player.look_around()
-        elif action == "inventory" or action == "i" or action == "bag":
-            self.player.show_inventory()
-        elif action == "get" or action == "take" or action == "pickup":
-            if target_name: self.player.pick_up(target_name, self.item_manager) # Pass item_manager
-            else: print("Pickup what? (e.g., get mickey ears)")
-        elif action == "drop":
-            if target_name: self.player.remove_item_from_inventory(target_name)
-            else: print("Drop what?")
-        elif action == "buy":
-            if target_name: self.player.buy_item(target_name, self.item_manager)
-            else: print("Buy what? (e.g., buy churro)")
-        elif action == "sell":
-            if target_name: self.player.sell_item(target_name)
-            else: print("Sell what? (e.g., sell lost map)")
-        elif action == "ride":
-            if not isinstance(self.player.current_area, Ride):
-                print("You need to be in a ride area (like a queue) to experience a ride.")
-                # Check if player is in a Land and there's a ride with that name as a sub-area
-                if args and self.player.current_area and hasattr(self.player.current_area, 'sub_areas'):
-                    target_ride_name_for_suggestion = " ".join(args)
-                    for sub_area in self.player.current_area.sub_areas:
-                        if isinstance(sub_area, Ride) and sub_area.name.lower() == target_ride_name_for_suggestion.lower():
-                            print(f"Try 'enter {sub_area.name}' first.")
-                            break
-                return
-
-            ride_area = self.player.current_area # This is a Ride object
-            if args and " ".join(args).lower() != ride_area.name.lower():
-                print(f"You are in {ride_area.name}. If you want to ride this, just type 'ride'.")
-                return
-
-            ride_area.experience_ride(self.player)
-            # The turn will advance in update_world()
-        elif action == "teleport" or action == "tp":
-            if not args:
-                print("Teleport where? Usage: tp <area_name> [x] [y]")
-                return
-            
-            area_name_parts = []
-            tp_x, tp_y = None, None
-            
-            if len(args) >= 2 and args[-2].isdigit() and args[-1].isdigit():
-                try:
-                    tp_x = int(args[-2])
-                    tp_y = int(args[-1])
-                    area_name_parts = args[:-2]
-                except ValueError: area_name_parts = args # Not numbers
-            else: area_name_parts = args
-
-            target_area_name_query = " ".join(area_name_parts)
-            if not target_area_name_query: # If only numbers were given, or no name part
-                print("You need to specify an area name to teleport to.")
-                return
-
-            matched_areas = self.area_manager.find_areas_by_partial_name(target_area_name_query)
-            
-            if not matched_areas:
-                print(f"Sorry, can't find any place matching '{target_area_name_query}'.")
-                return
-            elif len(matched_areas) == 1:
-                target_area = matched_areas[0]
-                self.player.teleport(target_area, tp_x, tp_y)
-            else: # Multiple matches
-                print(f"Found multiple places matching '{target_area_name_query}'. Please be more specific:")
-                for area in matched_areas:
-                    print(f"  - {area.name}")
-                # Player needs to issue a new, more specific command.
-                return
-        elif action == "whereami":
-             if self.player.current_area:
-                gx, gy = self.player.get_grid_position()
-                print(f"You are in {self.player.current_area.name} at grid ({gx},{gy}). Global: {self.player.coordinates}")
-             else: print("You are nowhere specific.")
-        elif action == "quit" or action == "exit":
-            self.running = False
-        elif action == "where":
-            if not args:
-                print("Where what? Please specify what you are looking for (e.g., where Jungle Cruise).")
-                return
-            
-            search_term = " ".join(args).lower()
-            found_locations = []
-            for area_obj in self.area_manager.areas.values(): # Iterate through Area objects
-                if search_term in area_obj.name.lower():
-                    found_locations.append(area_obj)
-
-            if not found_locations:
-                print(f"No place matching '{' '.join(args)}' was found.")
-            else:
-                print(f"Locations matching '{' '.join(args)}':")
-                for loc in found_locations:
-                    print(f"  - {loc.name}: Starts around global coordinates {loc.area_origin_coords}.")
+        if not args:
+            self._cmd_unknown(args)
+            return
+        target_name = " ".join(args)
+        # Try to match a connection key like "enter <target_sub_area_name>"
+        potential_connection_key = f"enter {target_name}" # args are already lowercase
+        if self.player.current_area and potential_connection_key in self.player.current_area.connections:
+            self.player.move(potential_connection_key)
+        else:
+            print(f"You can't seem to enter '{target_name}' from here.")
+
+    def _cmd_exit(self, args):
+        # Plain "exit" quits; "exit to <place>" uses a named exit (e.g. "exit to main street")
+        if not args:
+            self._cmd_quit(args)
+            return
+        target_name = " ".join(args)
+        full_exit_command = f"exit {target_name}" # args are already lowercase
+        if self.player.current_area and full_exit_command in self.player.current_area.connections:
+            self.player.move(full_exit_command)
+        else:
+            print(f"You can't seem to exit via '{target_name}' from here. Try 'look' for exit descriptions or walk to an exit portal.")
+
+    def _cmd_look(self, args):
+        self.player.look_around()
+
+    def _cmd_inventory(self, args):
+        self.player.show_inventory()
+
+    def _cmd_get(self, args):
+        target_name = " ".join(args)
+        if target_name: self.player.pick_up(target_name, self.item_manager) # Pass item_manager
+        else: print("Pickup what? (e.g., get mickey ears)")
+
+    def _cmd_drop(self, args):
+        target_name = " ".join(args)
+        if target_name: self.player.remove_item_from_inventory(target_name)
+        else: print("Drop what?")
+
+    def _cmd_buy(self, args):
+        target_name = " ".join(args)
+        if target_name: self.player.buy_item(target_name, self.item_manager)
+        else: print("Buy what? (e.g., buy churro)")
+
+    def _cmd_sell(self, args):
+        target_name = " ".join(args)
+        if target_name: self.player.sell_item(target_name)
+        else: print("Sell what? (e.g., sell lost map)")
+
+    def _cmd_ride(self, args):
+        target_name = " ".join(args)
+        if not isinstance(self.player.current_area, Ride):
+            print("You need to be in a ride area (like a queue) to experience a ride.")
+            # Check if player is in a Land and there's a ride with that name as a sub-area
+            if args and self.player.current_area:
+                for sub_area in self.player.current_area.sub_areas:
+                    if isinstance(sub_area, Ride) and sub_area.name.lower() == target_name:
+                        print(f"Try 'enter {sub_area.name}' first.")
+                        break
+            return
+
+        ride_area = self.player.current_area # This is a Ride object
+        if args and target_name != ride_area.name.lower():
+            print(f"You are in {ride_area.name}. If you want to ride this, just type 'ride'.")
+            return
+
+        ride_area.experience_ride(self.player)
+        # The turn will advance in update_world()
+
+    def _cmd_teleport(self, args):
+        if not args:
+            print("Teleport where? Usage: tp <area_name> [x] [y]")
+            return
+        
+        area_name_parts = []
+        tp_x, tp_y = None, None
+        
+        if len(args) >= 2 and args[-2].isdigit() and args[-1].isdigit():
+            try:
+                tp_x = int(args[-2])
+                tp_y = int(args[-1])
+                area_name_parts = args[:-2]
+            except ValueError: area_name_parts = args # Not numbers
+        else: area_name_parts = args
+
+        target_area_name_query = " ".join(area_name_parts)
+        if not target_area_name_query: # If only numbers were given, or no name part
+            print("You need to specify an area name to teleport to.")
+            return
+
+        matched_areas = self.area_manager.find_areas_by_partial_name(target_area_name_query)
+        
+        if not matched_areas:
+            print(f"Sorry, can't find any place matching '{target_area_name_query}'.")
+            return
+        elif len(matched_areas) == 1:
+            target_area = matched_areas[0]
+            self.player.teleport(target_area, tp_x, tp_y)
+        else: # Multiple matches
+            print(f"Found multiple places matching '{target_area_name_query}'. Please be more specific:")
+            for area in matched_areas:
+                print(f"  - {area.name}")
+            # Player needs to issue a new, more specific command.
+            return
+
+    def _cmd_whereami(self, args):
+        if self.player.current_area:
+            gx, gy = self.player.get_grid_position()
+            print(f"You are in {self.player.current_area.name} at grid ({gx},{gy}). Global: {self.player.coordinates}")
+        else: print("You are nowhere specific.")
+
+    def _cmd_quit(self, args):
+        self.running = False
+
+    def _cmd_where(self, args):
+        if not args:
+            print("Where what? Please specify what you are looking for (e.g., where Jungle Cruise).")
+            return
+        target_name = " ".join(args)
+        found_locations = self.area_manager.find_areas_by_partial_name(target_name) # Uses the pre-lowered names
+
+        if not found_locations:
+            print(f"No place matching '{target_name}' was found.")
         else:
-            print(f"Command not understood. Try 'help' for commands.")
+            print(f"Locations matching '{target_name}':")
+            for loc in found_locations:
+                print(f"  - {loc.name}: Starts around global coordinates {loc.area_origin_coords}.")
 
     def update_world(self):
         self.game_turn += 1
+        self.scheduler.tick(self.game_turn)
+
+    def _update_npcs(self, turns):
+        # Goes through self.npc_manager on each call, since loading a world cache replaces it.
         # Pass the player to the NPC manager so it can filter messages based on proximity
         npc_action_messages = self.npc_manager.update_all_npcs(self.game_turn, self.player)
-        self.player.update_suspicion_decay() # Player's suspicion passively decays
         for msg in npc_action_messages:
             print(msg) # Print messages from NPC actions
 
@@ -312,43 +444,38 @@ class GameManager:
         print("\nWelcome to your Disneyland Adventure!")
         print("Type 'help' for a list of commands, or 'quit' to exit.")
 
-        original_stdout = sys.stdout
-        output_monitor = OutputMonitor(original_stdout)
-        sys.stdout = output_monitor
-
+        ambient_messages = _AMBIENT_NO_EVENT_MESSAGES
+        choose_ambient = self._rng.choice # Bound once, outside the loop
+        read_line = sys.stdin.readline
         while self.running:
-            command_input = input("\n> ").strip()
-            output_monitor.texts_buffer.clear() # Reset for game logic output
-
-            if command_input:
-                if command_input.lower() == 'help':
-                    print("\nAvailable commands:")
-                    print("  n, s, e, w (or north, south, east, west) - Move")
-                    print("  enter <place_name> - Use a named entrance (e.g., 'enter emporium')")
-                    print("  exit to <place_name> - Use a named exit (e.g., 'exit to main street')")
-                    print("  look (l)          - Look around the area")
-                    print("  inventory (i, bag)- Check your bag and money")
-                    print("  get <item_name>   - Pick up an item")
-                    print("  drop <item_name>  - Drop an item")
-                    print("  buy <item_name>   - Buy an item from a shop")
-                    print("  sell <item_name>  - Sell an item to a shop")
-                    print("  ride              - Experience the ride you are currently in (e.g., a ride queue)")
-                    print("  teleport (tp) <area_name> [x] [y] - Fast travel")
-                    print("  where <place_name> - Find the global coordinates of a place")
-                    print("  whereami          - Show your current location details")
-                    print("  quit (exit)       - Exit the game")
-                else:
-                    self.process_command(command_input)
-                
-                if self.running: # Don't update world if quit command was issued
-                    self.update_world() 
-            elif self.running: # Empty input, pass turn
-                 self.update_world()
-            
-            buffered_texts = output_monitor.get_buffered_texts_and_reset()
-
-            if self.running and not buffered_texts:
-                print(random.choice(self._AMBIENT_NO_EVENT_MESSAGES))
-
-        sys.stdout = original_stdout # Restore original stdout
-        print("\nThanks for visiting Disneyland! Come back soon!")
\ No newline at end of file
+            sys.stdout.write("\n> ")
+            sys.stdout.flush() # The prompt has no newline, so push it out before blocking on input
+            line = read_line()
+            if not line: # End of input (Ctrl-D or a closed pipe) ends the game like 'quit'
+                self.running = False
+                break
+            command_input = line.strip()
+
+            # Everything the turn prints is collected in memory and written out in one go;
+            # the buffer also tells us whether the turn produced any text at all
+            turn_output = io.StringIO()
+            try:
+                with redirect_stdout(turn_output):
+                    if command_input:
+                        if command_input.lower() == 'help':
+                            print(self._HELP_TEXT)
+                        else:
+                            self.process_command(command_input)
+
+                        if self.running: # Don't update world if quit command was issued
+                            self.update_world()
+                    elif self.running: # Empty input, pass turn
+                        self.update_world()
+            finally: # Written even if the turn raised, so nothing it printed is lost
+                turn_text = turn_output.getvalue()
+                sys.stdout.write(turn_text)
+
+            if self.running and (not turn_text or turn_text.isspace()):
+                print(choose_ambient(ambient_messages))
+
+        print("\nThanks for visiting Disneyland! Come back soon!")
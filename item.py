@@ -2,10 +2,23 @@
 Item module for the Disneyland Adventure game.
 Handles all items that can be picked up, used, or interacted with.
 """
-import random
+import copy
+import sys
+from itertools import count
+
+# Monotonic suffixes for item IDs; unlike random numbers these can never collide
+_item_ids = count(1)
 
 class Item:
     """Base class for all items in the game."""
+    __slots__ = (
+        'name', 'description', 'value', 'buy_back_price', 'pickupable', '_slug', 'id',
+        'coordinates', 'is_unpaid', 'unpaid_from_shop_id',
+    )
+    # Type flags checked instead of isinstance() wherever Items and NPCs share a grid cell
+    _is_item = True
+    _is_npc = False
+
     def __init__(self, name, description, value=0, pickupable=True, sell_value_modifier=0.5):
         self.name = name
         self.description = description
@@ -13,7 +26,8 @@ class Item:
         # Price shop pays player for this item. Can be a fixed value or calculated.
         self.buy_back_price = round(value * sell_value_modifier)
         self.pickupable = pickupable
-        self.id = f"item_{name.lower().replace(' ', '_')}_{random.randint(1000,9999)}"
+        self._slug = name.lower().replace(' ', '_') # Reused by clone() for new IDs
+        self.id = f"item_{self._slug}_{next(_item_ids)}"
         self.coordinates = None # Global coordinates if in an area, None if in inventory
         self.is_unpaid = False # True if taken from a shop without paying
         self.unpaid_from_shop_id = None # ID of the shop it was taken from
@@ -23,16 +37,14 @@ class Item:
 
     def clone(self):
         """Creates a new instance of this item (a copy)."""
-        return Item(
-            name=self.name,
-            description=self.description,
-            value=self.value,
-            pickupable=self.pickupable,
-            # The sell_value_modifier for the prototype is used to calculate its buy_back_price
-            # When cloning, we just copy the calculated buy_back_price directly.
-            # The sell_value_modifier argument in __init__ is for prototype creation.
-            # We can reconstruct it if needed, or just ensure buy_back_price is set.
-        )
+        # A shallow copy keeps the subclass and every slot (including the prototype's already
+        # calculated buy_back_price) without re-running __init__; then reset the per-instance state
+        new_item = copy.copy(self)
+        new_item.id = f"item_{self._slug}_{next(_item_ids)}"
+        new_item.coordinates = None
+        new_item.is_unpaid = False
+        new_item.unpaid_from_shop_id = None
+        return new_item
 
     def to_dict(self):
         """Convert item to dictionary for serialization (future use)."""
@@ -67,7 +79,18 @@ class ItemManager:
         self.world_items = {} # item_id -> Item (instance in the world or inventory)
 
     def add_prototype(self, item_prototype):
-        self.item_prototypes[item_prototype.name.lower()] = item_prototype
+        self.item_prototypes[sys.intern(item_prototype.name.lower())] = item_prototype
+
+    def resume_item_ids(self):
+        """Make new item IDs continue past every ID held here (used after restoring a saved world)."""
+        global _item_ids
+        next_id = next(_item_ids)
+        for item in list(self.item_prototypes.values()) + list(self.world_items.values()):
+            try:
+                next_id = max(next_id, int(item.id.rsplit('_', 1)[1]) + 1)
+            except ValueError:
+                pass # Not one of our numbered IDs
+        _item_ids = count(next_id)
 
     def create_instance(self, item_name):
         prototype = self.item_prototypes.get(item_name.lower())
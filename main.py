@@ -10,7 +10,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mod
 from modules.game_manager import GameManager
 
 def main():
-    game = GameManager()
+    # Set DISNEYLAND_WORLD_CACHE to a file path to reuse the built world across runs
+    game = GameManager(world_cache_path=os.environ.get("DISNEYLAND_WORLD_CACHE"))
     game.initialize_game()
     game.run()
 
@@ -3,50 +3,85 @@ NPC module for the Disneyland Adventure game.
 Handles Non-Player Characters.
 """
 import random
+from itertools import count
 from .coordinates import Coordinates
 
+# Monotonic ID suffixes, one sequence per kind of NPC; unlike random numbers these can never collide
+_npc_ids = count(1)
+_char_ids = count(1)
+_guest_ids = count(1)
+_cast_ids = count(1)
+_shady_ids = count(1)
+
+# Grid steps an NPC picks from when it wanders; (0, 0) means it stays put this turn
+_WANDER_STEPS = ((0, 1), (0, -1), (1, 0), (-1, 0), (0, 0))
+# Cooldown lengths (in turns) after an action. random.choice over these tuples draws exactly what
+# random.randint over the same range would, without randint's argument handling
+_WANDER_COOLDOWNS = (2, 3, 4, 5)
+_SIGNATURE_COOLDOWNS = (3, 4, 5, 6)
+
 class NPC:
     """NPC class representing non-player characters."""
+    # No per-instance __dict__; subclasses list only the attributes they add
+    __slots__ = ('name', 'description', 'coordinates', 'location', 'id', 'action_cooldown', '_gx', '_gy')
+    _is_npc = True # Lets Area recognise NPCs (and subclasses) without importing this module
+    _is_item = False
+    _is_cast_member = False # Set on CastMember so staff can be spotted without an isinstance check
+    _PROXIMITY_R2 = 10 * 10 # Squared distance within which the player sees this NPC's actions
     def __init__(self, name, description, start_coords=None, area=None):
         self.name = name
         self.description = description
         self.coordinates = start_coords if start_coords else Coordinates(0,0) # Global coordinates
         self.location = area # Current Area object
-        self.id = f"npc_{name.lower().replace(' ', '_')}_{random.randint(1000,9999)}"
+        self.id = f"npc_{name.lower().replace(' ', '_')}_{next(_npc_ids)}"
         self.action_cooldown = 0
+        # Grid cell within self.location, kept current by Area.add_object_to_grid; None while off the grid
+        self._gx = self._gy = None
 
     def set_location(self, area, grid_x=None, grid_y=None):
         """Places the NPC in an area and on its grid."""
-        if self.location and self.location != area:
-            old_gx, old_gy = self.location.get_relative_coordinates(self.coordinates)[:2]
-            self.location.remove_object_from_grid(self, int(old_gx), int(old_gy))
-
-        self.location = area
         if area:
             if grid_x is None: grid_x = area.grid_width // 2
             if grid_y is None: grid_y = area.grid_length // 2
-            
-            grid_x = max(0, min(grid_x, area.grid_width - 1))
-            grid_y = max(0, min(grid_y, area.grid_length - 1))
-            
+
+            # Clamp onto the grid with plain comparisons rather than min()/max() calls
+            if grid_x < 0: grid_x = 0
+            elif grid_x >= area.grid_width: grid_x = area.grid_width - 1
+            if grid_y < 0: grid_y = 0
+            elif grid_y >= area.grid_length: grid_y = area.grid_length - 1
+
+            # Already placed on that very cell; skip the remove/add round-trip. A location set
+            # without a grid placement (or a removed NPC) must still go through add_object_to_grid
+            if (self.location is area and self._gx == grid_x and self._gy == grid_y
+                    and area.has_npc(self)):
+                return
+
+        if self.location: # Leave the old cell, whether or not the area changes
+            old_gx, old_gy = self.get_grid_position()
+            self.location.remove_object_from_grid(self, old_gx, old_gy)
+
+        self.location = area
+        if area:
             area.add_object_to_grid(self, grid_x, grid_y) # Also updates self.coordinates
         else:
             self.coordinates = Coordinates(-1,-1) # Off-map
 
     def get_grid_position(self):
         if not self.location: return None, None
-        rel_coords = self.location.get_relative_coordinates(self.coordinates)
-        return int(rel_coords[0]), int(rel_coords[1])
+        if self._gx is None: # Not placed on the grid (or removed from it); derive the cell from the coordinates
+            return self.location.get_relative_grid(self.coordinates)
+        return self._gx, self._gy
 
     def move_on_grid(self, dx, dy):
-        if not self.location: return False, None
+        area = self.location
+        if not area: return False, None
 
         current_gx, current_gy = self.get_grid_position()
         new_gx, new_gy = current_gx + dx, current_gy + dy
 
-        if self.location.is_valid_grid_position(new_gx, new_gy):
-            self.location.remove_object_from_grid(self, current_gx, current_gy)
-            self.location.add_object_to_grid(self, new_gx, new_gy)
+        if area.is_valid_grid_position(new_gx, new_gy):
+            area.remove_object_from_grid(self, current_gx, current_gy)
+            area.add_object_to_grid(self, new_gx, new_gy)
             return True, f"{self.name} moves."
         return False, None
 
@@ -62,27 +97,27 @@ class NPC:
 
         # Only move within the current area, don't jump between areas
         if self.location and random.random() < 0.3: # 30% chance to try to move
-            dx, dy = random.choice([(0,1), (0,-1), (1,0), (-1,0), (0,0)])
+            dx, dy = random.choice(_WANDER_STEPS)
             if dx != 0 or dy != 0: # Don't report standing still as an action
                 moved, msg_part = self.move_on_grid(dx, dy)
                 if moved:
                     # Only generate a message if the player is in the same area and close enough
                     if player and player.current_area == self.location:
-                        # Calculate distance to player
-                        player_distance = self.coordinates.distance_to(player.coordinates)
                         # Only show messages for NPCs within a reasonable distance (e.g., 10 units)
-                        if player_distance <= 10:
+                        # Compare squared distances to skip the square root
+                        if self.coordinates.distance_to_sq(player.coordinates) <= self._PROXIMITY_R2:
                             action_message = msg_part # e.g., "Mickey Mouse moves."
-            self.action_cooldown = random.randint(2, 5) # Wait a bit before next action
+            self.action_cooldown = random.choice(_WANDER_COOLDOWNS) # Wait a bit before next action
         
         return action_message
 
 
 class ParkCharacter(NPC):
     """Represents iconic Disney characters like Mickey, Goofy, etc."""
+    __slots__ = ('signature_move',)
     def __init__(self, name, description, start_coords=None, area=None, signature_move="waves cheerfully"):
         super().__init__(name, description, start_coords, area)
-        self.id = f"char_{name.lower().replace(' ', '_').replace('.', '')}_{random.randint(1000,9999)}"
+        self.id = f"char_{name.lower().replace(' ', '_').replace('.', '')}_{next(_char_ids)}"
         self.signature_move = signature_move
 
     def update(self, game_turn, player=None):
@@ -91,22 +126,22 @@ class ParkCharacter(NPC):
         if not action_message and self.action_cooldown == 0 and random.random() < 0.2:
             # Only show signature move if player is in the same area and close enough
             if player and player.current_area == self.location:
-                player_distance = self.coordinates.distance_to(player.coordinates)
-                if player_distance <= 10:
+                if self.coordinates.distance_to_sq(player.coordinates) <= self._PROXIMITY_R2:
                     action_message = f"{self.name} {self.signature_move}."
-                    self.action_cooldown = random.randint(3, 6)
+                    self.action_cooldown = random.choice(_SIGNATURE_COOLDOWNS)
             else:
                 # Still set cooldown even if we don't show the message
-                self.action_cooldown = random.randint(3, 6)
+                self.action_cooldown = random.choice(_SIGNATURE_COOLDOWNS)
         return action_message
 
 
 class Guest(NPC):
     """Guest class representing NPCs that are Disneyland visitors."""
+    __slots__ = ('suspicion_level', 'has_been_checked')
     def __init__(self, name, description, start_coords=None, area=None):
         # Ensure Guest names are somewhat unique for targeting if needed later
         super().__init__(f"Guest {name}", description, start_coords, area)
-        self.id = f"guest_{name.lower().replace(' ', '_')}_{random.randint(1000,9999)}"
+        self.id = f"guest_{name.lower().replace(' ', '_')}_{next(_guest_ids)}"
         # Guests might have a "suspicion_level" if player tries to plant items on them
         self.suspicion_level = 0
         self.has_been_checked = False # Flag for distraction mechanic
@@ -119,11 +154,14 @@ class Guest(NPC):
 
 class CastMember(NPC):
     """Cast Member class representing Disneyland employees."""
+    __slots__ = ('role', 'alertness')
+    _is_cast_member = True
+    _ALERTNESS_RANGE = (0.5, 1.0)
     def __init__(self, name, description, start_coords=None, area=None, role="General"):
         super().__init__(f"CM {name}", description, start_coords, area) # Prefix with CM for clarity
-        self.id = f"cast_{name.lower().replace(' ', '_')}_{random.randint(1000,9999)}"
+        self.id = f"cast_{name.lower().replace(' ', '_')}_{next(_cast_ids)}"
         self.role = role # e.g., "Security", "Cashier", "Greeter"
-        self.alertness = random.uniform(0.5, 1.0) # How observant they are
+        self.alertness = random.uniform(*self._ALERTNESS_RANGE) # How observant they are
 
     def update(self, game_turn, player=None):
         """Cast members might patrol or stay at posts. For now, standard NPC movement."""
@@ -132,42 +170,88 @@ class CastMember(NPC):
 
 class ShadyCharacter(NPC):
     """Represents a character who deals in illicit goods."""
+    __slots__ = ('greeting',)
+    _PROXIMITY_R2 = 5 * 5 # Closer proximity threshold
     def __init__(self, name, description, start_coords=None, area=None, greeting="Psst... got something for me?"):
         super().__init__(name, description, start_coords, area)
-        self.id = f"shady_{name.lower().replace(' ', '_').replace('.', '')}_{random.randint(1000,9999)}"
+        self.id = f"shady_{name.lower().replace(' ', '_').replace('.', '')}_{next(_shady_ids)}"
         self.greeting = greeting
 
     def update(self, game_turn, player=None):
         """Shady characters mostly stay put, maybe offer a hint if player is nearby."""
         # Only generate a message if the player is in the same area and close enough
         if player and player.current_area == self.location:
-            player_distance = self.coordinates.distance_to(player.coordinates)
-            if player_distance <= 5 and random.random() < 0.2:  # Closer proximity threshold and occasional hint
+            close_to_player = self.coordinates.distance_to_sq(player.coordinates) <= self._PROXIMITY_R2
+            if close_to_player and random.random() < 0.2:  # Occasional hint
                 return f"{self.name} whispers: '{self.greeting}'"
         
         # They don't wander like other NPCs unless explicitly told to
         return None
 
 class NPCManager:
+    # Farthest an NPC can be from the player (in grid cells) and still produce a message this turn:
+    # the 10-unit visibility range plus the one cell it may step before the check
+    _MESSAGE_RADIUS = 11
+
     def __init__(self):
         self.npcs = {} # npc_id -> NPC_object
+        self._by_lower_name = {} # npc.name.lower() -> first NPC_object added with that name
 
     def add_npc(self, npc):
+        replacing = npc.id in self.npcs
         self.npcs[npc.id] = npc
+        if replacing: # The replaced NPC may own a name entry, so rebuild the index
+            self._by_lower_name = {}
+            for existing in self.npcs.values():
+                self._by_lower_name.setdefault(existing.name.lower(), existing)
+        else:
+            self._by_lower_name.setdefault(npc.name.lower(), npc)
 
-    def get_npc(self, npc_id_or_name):
-        if npc_id_or_name in self.npcs: return self.npcs[npc_id_or_name]
+    def resume_after_load(self):
+        """
+        Prepare NPCs restored from a saved world for this run: new NPC IDs continue past every ID
+        held here, and Cast Members draw fresh alertness instead of replaying the saved values.
+        """
+        global _npc_ids, _char_ids, _guest_ids, _cast_ids, _shady_ids
+        next_ids = {"npc": next(_npc_ids), "char": next(_char_ids), "guest": next(_guest_ids),
+                    "cast": next(_cast_ids), "shady": next(_shady_ids)}
         for npc in self.npcs.values():
-            if npc.name.lower() == npc_id_or_name.lower(): return npc
-        return None
+            kind = npc.id.split('_', 1)[0]
+            try:
+                if kind in next_ids:
+                    next_ids[kind] = max(next_ids[kind], int(npc.id.rsplit('_', 1)[1]) + 1)
+            except ValueError:
+                pass # Not one of our numbered IDs
+            if npc._is_cast_member:
+                npc.alertness = random.uniform(*npc._ALERTNESS_RANGE)
+        _npc_ids = count(next_ids["npc"])
+        _char_ids = count(next_ids["char"])
+        _guest_ids = count(next_ids["guest"])
+        _cast_ids = count(next_ids["cast"])
+        _shady_ids = count(next_ids["shady"])
+
+    def get_npc(self, npc_id_or_name):
+        npc = self.npcs.get(npc_id_or_name)
+        if npc is not None: return npc
+        return self._by_lower_name.get(npc_id_or_name.lower())
 
     def update_all_npcs(self, game_turn, player=None):
         """
         Update all NPCs and collect their action messages.
-        If player is provided, only show messages for NPCs close to the player.
+        Every NPC moves each turn, but only those close to the player (found via the area's
+        spatial buckets) are given the player to check their message distance against.
         """
+        nearby = None
+        if player and player.current_area:
+            area = player.current_area
+            player_gx, player_gy = area.get_relative_grid(player.coordinates)
+            nearby = set(area.get_npcs_within(player_gx, player_gy, self._MESSAGE_RADIUS))
+
         messages = []
-        for npc_id, npc_obj in self.npcs.items():
+        for npc_obj in self.npcs.values():
+            if nearby is not None and npc_obj not in nearby:
+                npc_obj.update(game_turn) # Too far away for any message to reach the player
+                continue
             message = npc_obj.update(game_turn, player)
             if message:
                 messages.append(message)
@@ -3,22 +3,43 @@ Player module for the Disneyland Adventure game.
 Handles the player character and their interactions.
 """
 from .coordinates import Coordinates
-from .area import Land, FenceShop # To check instance type for get_current_land and FenceShop
-from .item import Item # For type hinting and isinstance checks
+import math
 import random
+from operator import itemgetter
+
+# Distance within which look_around lists other people in the area
+_VISIBLE_RANGE = 10
+
+# Grid step (dx, dy) for each compass direction the player can walk
+_MOVE_STEPS = {"north": (0, 1), "south": (0, -1), "east": (1, 0), "west": (-1, 0)}
+
+# Sort key for (npc, distance) pairs
+_BY_DISTANCE = itemgetter(1)
+
 class Player:
     """Player class for the game."""
-    def __init__(self, name="Adventurer", start_money=100):
+    # No per-instance __dict__, matching Area, Item and NPC
+    __slots__ = (
+        'name', 'area_manager', 'inventory', '_inventory_by_name', '_unpaid_by_shop',
+        'current_area', 'coordinates', '_gx', '_gy', 'money', 'suspicion_rating',
+    )
+    def __init__(self, name="Adventurer", start_money=100, area_manager=None):
         self.name = name
+        self.area_manager = area_manager # Used to resolve portal targets by area ID
         self.inventory = []
+        self._inventory_by_name = {} # item.name.lower() -> [Item, ...] in the order they were added
+        self._unpaid_by_shop = {} # shop id -> [unpaid Item, ...] in inventory order
         self.current_area = None
         self.coordinates = Coordinates(0, 0) # Global coordinates
+        # Grid cell within self.current_area, kept current by set_current_area and move; None until placed
+        self._gx = self._gy = None
         self.money = start_money
         self.suspicion_rating = 0 # How suspicious the player appears to Cast Members
 
     def set_current_area(self, area, grid_x=None, grid_y=None):
         """Set the current area for the player and position them on its grid."""
         old_area_being_left = self.current_area # Store the area player is LEAVING
+        exit_gx, exit_gy = self.get_grid_position() # Where they stood in it, before the move below
 
         self.current_area = area
         if area:
@@ -29,13 +50,14 @@ class Player:
             grid_y = max(0, min(grid_y, area.grid_length - 1))
 
             self.coordinates = area.get_global_coordinates(grid_x, grid_y)
+            self._gx, self._gy = grid_x, grid_y
             
             # Check for theft when leaving a shop
             # This check is for when player leaves 'old_area_being_left' if it was a shop,
             # and isn't just moving to its parent area (which is a normal exit).
-            if old_area_being_left and hasattr(old_area_being_left, 'is_shop') and old_area_being_left.is_shop:
+            if old_area_being_left and old_area_being_left.is_shop:
                 if area != old_area_being_left and area != old_area_being_left.parent_area:
-                    self.check_for_theft(old_area_being_left)
+                    self.check_for_theft(old_area_being_left, exit_gx, exit_gy)
 
             print(f"You are now in {area.name}. {area.description}") # Message after potential theft check
             self.look_around()
@@ -45,150 +67,152 @@ class Player:
 
     def get_grid_position(self):
         """Get the player's position relative to the current area's grid."""
-        if not self.current_area: return None, None
-        rel_coords = self.current_area.get_relative_coordinates(self.coordinates)
-        return int(rel_coords[0]), int(rel_coords[1])
+        area = self.current_area
+        if not area: return None, None
+        if self._gx is None: # Not placed yet; derive the cell from the coordinates
+            return area.get_relative_grid(self.coordinates)
+        return self._gx, self._gy
 
     def get_current_land_name(self):
-        """Traverses up parent_area to find the name of the Land the player is in."""
+        """Name of the Land (the topmost area above the current one) the player is in."""
         if not self.current_area:
             return None
-        
-        area = self.current_area
-        # If current_area is already a Land, its parent is None.
-        # If current_area is a sub-area, traverse up.
-        while area.parent_area:
-            area = area.parent_area
-        
-        # Now 'area' is the topmost area in this hierarchy.
-        # We assume a Land will not have a parent_area.
-        if isinstance(area, Land): # Check if it's a Land instance
-            return area.name
-        elif not area.parent_area: # It's a top-level area but not specifically a Land
-             return area.name # Could be a standalone area not part of a Land
-        return None # Should not happen if structure is correct
+        return self.current_area.get_land_name() # Cached on the area until parent links change
 
     def look_around(self):
-        if not self.current_area:
+        area = self.current_area # Read once into a local; it's used throughout
+        if not area:
             print("You are floating in a magical void...")
             return
+        coords = self.coordinates
         grid_x, grid_y = self.get_grid_position()
         
-        current_land_name = self.get_current_land_name()
-        location_header = self.current_area.name
-        if current_land_name and self.current_area.name != current_land_name:
+        current_land_name = area.get_land_name()
+        location_header = area.name
+        if current_land_name and area.name != current_land_name:
             location_header += f" (in {current_land_name})"
 
-        print(f"\n--- {location_header} ---")
-        print(self.current_area.description)
-        print(f"You are at grid position ({grid_x}, {grid_y}).")
+        # Collect the whole description and print it in one call
+        lines = [f"\n--- {location_header} ---", area.description, f"You are at grid position ({grid_x}, {grid_y})."]
+        add = lines.append
 
-        objects_here = self.current_area.get_objects_at_grid_cell(grid_x, grid_y)
-        items_here = [obj for obj in objects_here if isinstance(obj, Item)]
+        objects_here = area.get_objects_at_grid_cell(grid_x, grid_y)
+        # Split the cell into items and people in a single pass
+        items_here, npcs_here = [], []
+        for obj in objects_here:
+            if obj._is_item: items_here.append(obj)
+            elif obj._is_npc: npcs_here.append(obj)
         if items_here:
-            print("Items at your feet:")
-            for item in items_here: print(f"  - {item.name}: {item.description}")
-        
-        npcs_here = [obj for obj in objects_here if obj.__class__.__name__ == "NPC"]
+            add("Items at your feet:")
+            for item in items_here: add(f"  - {item.name}: {item.description}")
+
         if npcs_here:
-            print("People here:")
-            for npc in npcs_here: print(f"  - {npc.name}")
+            add("People here:")
+            for npc in npcs_here: add(f"  - {npc.name}")
 
         # Show other items/NPCs in the current specific area
-        other_items_in_current_area = [item for item in self.current_area.items if item not in items_here]
+        other_items_in_current_area = [item for item in area.items if item not in items_here]
         if other_items_in_current_area:
-            print("Other items in this spot:")
+            add("Other items in this spot:")
             for item in other_items_in_current_area:
-                item_gx, item_gy = self.current_area.get_relative_coordinates(item.coordinates)[:2]
-                print(f"  - {item.name} at ({int(item_gx)}, {int(item_gy)})")
+                item_gx, item_gy = area.get_relative_grid(item.coordinates)
+                add(f"  - {item.name} at ({item_gx}, {item_gy})")
 
-        # Only show NPCs that are close enough to be visible (within 10 units)
+        # Only show NPCs that are close enough to be visible (within 10 units);
+        # the area's spatial buckets do the culling, so only those NPCs pay for the square root
+        player_rel_x, player_rel_y = area.get_relative_grid(coords)
         visible_npcs_in_current_area = []
-        for npc in self.current_area.npcs:
+        for npc in area.get_npcs_within(player_rel_x, player_rel_y, _VISIBLE_RANGE):
             if npc not in npcs_here:
-                # Calculate distance to player
-                npc_distance = npc.coordinates.distance_to(self.coordinates)
-                if npc_distance <= 10:  # Only include NPCs within visible range
-                    visible_npcs_in_current_area.append((npc, npc_distance))
+                npc_distance = math.sqrt(npc.coordinates.distance_to_sq(coords))
+                visible_npcs_in_current_area.append((npc, npc_distance))
         
         if visible_npcs_in_current_area:
-            print("Other people you can see:")
+            add("Other people you can see:")
             # Sort by distance, closest first
-            for npc, distance in sorted(visible_npcs_in_current_area, key=lambda x: x[1]):
-                npc_gx, npc_gy = self.current_area.get_relative_coordinates(npc.coordinates)[:2]
-                print(f"  - {npc.name} at ({int(npc_gx)}, {int(npc_gy)}) - {distance:.1f} units away")
+            for npc, distance in sorted(visible_npcs_in_current_area, key=_BY_DISTANCE):
+                npc_gx, npc_gy = area.get_relative_grid(npc.coordinates)
+                add(f"  - {npc.name} at ({npc_gx}, {npc_gy}) - {distance:.1f} units away")
 
         # Show sub-areas if the current area is a Land (or a container)
-        if self.current_area.sub_areas:
-            print("Places inside here:")
-            for sub_area in self.current_area.sub_areas:
-                print(f"  - Entrance to {sub_area.name}") # Could be more descriptive
+        if area.sub_areas:
+            add("Places inside here:")
+            for sub_area in area.sub_areas:
+                add(f"  - Entrance to {sub_area.name}") # Could be more descriptive
 
-        if self.current_area.connections:
+        if area.connections:
             # Filter out connections that are just for entering sub-areas if already listed
             # This is a bit simplistic; a better way would be to tag connection types.
-            listed_sub_area_names = [sa.name.lower() for sa in self.current_area.sub_areas]
-            main_exits = {d: a for d, a in self.current_area.connections.items() if not any(sub_name in d for sub_name in listed_sub_area_names) or a not in self.current_area.sub_areas}
-            if main_exits: print("Exits:")
-            for direction, area in self.current_area.connections.items():
-                print(f"  - {direction.capitalize()}: to {area.name}")
+            listed_sub_area_names = area._sub_area_lnames
+            sub_areas = area.sub_areas
+            main_exits = {d: a for d, a in area.connections.items() if a not in sub_areas or not any(sub_name in d for sub_name in listed_sub_area_names)}
+            if main_exits: add("Exits:")
+            labels = area._connection_labels
+            for direction, exit_area in main_exits.items():
+                add(f"  - {labels[direction]}: to {exit_area.name}")
         
-        if hasattr(self.current_area, 'get_shop_sell_listing'): # Check if it's a Shop instance
+        if area.is_shop:
             # Pass player inventory to fence shop for its dynamic listing
-            if isinstance(self.current_area, FenceShop):
-                for line in self.current_area.get_shop_buy_listing(player_inventory=self.inventory): print(f"  {line}")
+            if area.is_fence_shop:
+                listings = area.get_shop_buy_listing(player_inventory=self.inventory)
             else: # Regular shop
-                for line in self.current_area.get_shop_sell_listing(): print(f"  {line}")
-                for line in self.current_area.get_shop_buy_listing(): print(f"  {line}")
-        print("---")
+                listings = area.get_shop_sell_listing() + area.get_shop_buy_listing()
+            lines.extend([f"  {line}" for line in listings])
+        add("---")
+        print("\n".join(lines))
 
     def move(self, direction):
-        if not self.current_area:
+        area = self.current_area
+        if not area:
             print("You can't move, you're not in any area.")
             return
 
-        grid_x, grid_y = self.get_grid_position()
-        new_grid_x, new_grid_y = grid_x, grid_y
-
-        if direction == "north": new_grid_y += 1
-        elif direction == "south": new_grid_y -= 1
-        elif direction == "east": new_grid_x += 1
-        elif direction == "west": new_grid_x -= 1
-        else:
-            if direction in self.current_area.connections:
-                self.set_current_area(self.current_area.connections[direction])
+        step = _MOVE_STEPS.get(direction)
+        if step is None: # Not a compass direction; it may be a named connection like "enter emporium"
+            target_area = area.connections.get(direction)
+            if target_area is not None:
+                self.set_current_area(target_area)
                 return
             print(f"Unknown direction: {direction}.")
             return
 
-        if self.current_area.is_valid_grid_position(new_grid_x, new_grid_y):
-            self.coordinates = self.current_area.get_global_coordinates(new_grid_x, new_grid_y)
+        grid_x, grid_y = self.get_grid_position()
+        new_grid_x, new_grid_y = grid_x + step[0], grid_y + step[1]
+
+        if area.is_valid_grid_position(new_grid_x, new_grid_y):
+            self.coordinates = area.get_global_coordinates(new_grid_x, new_grid_y)
+            self._gx, self._gy = new_grid_x, new_grid_y
             print(f"You move {direction}.")
 
             # Check for portals at the new location
-            current_gx, current_gy = self.get_grid_position()
-            if (current_gx, current_gy) in self.current_area.portals:
-                portal_info = self.current_area.portals[(current_gx, current_gy)]
-                target_area = portal_info['target_area']
-                target_gx = portal_info.get('target_gx')
-                target_gy = portal_info.get('target_gy')
+            portal_info = None
+            if (new_grid_x, new_grid_y) in area.portals:
+                # Portals name their target by area ID, so resolving one needs the AreaManager
+                if self.area_manager is None:
+                    print(f"Warning: The portal at ({new_grid_x}, {new_grid_y}) in {area.name} can't be used; the player has no area_manager to look up its target.")
+                else:
+                    portal_info = area.resolve_portal(new_grid_x, new_grid_y, self.area_manager)
+                    if portal_info is None:
+                        print(f"Warning: The portal at ({new_grid_x}, {new_grid_y}) in {area.name} leads to an area that isn't registered.")
+            if portal_info is not None:
+                target_area, target_gx, target_gy = portal_info
                 
-                if target_area == self.current_area.parent_area:
-                     print(f"You find an exit from {self.current_area.name} and step back into {target_area.name}.")
+                if target_area == area.parent_area:
+                     print(f"You find an exit from {area.name} and step back into {target_area.name}.")
                 else:
                      print(f"You step through an opening into {target_area.name}...")
                 self.set_current_area(target_area, target_gx, target_gy)
                 return # Movement and transition complete
             # No portal, just regular move.
 
-        elif direction in self.current_area.connections: # Edge of grid, try connection
-            target_area = self.current_area.connections[direction]
+        else: # Edge of grid, try connection
+            target_area = area.connections.get(direction)
+            if target_area is None:
+                print("You can't go that way. Perhaps a wall or the edge of the park?")
+                return
             print(f"You head {direction} and arrive in {target_area.name}.")
             # Enter new area at its default position (usually center)
             self.set_current_area(target_area) 
-            return
-        else:
-            print("You can't go that way. Perhaps a wall or the edge of the park?")
 
     def teleport(self, target_area, grid_x=None, grid_y=None):
         if not target_area:
@@ -199,9 +223,11 @@ class Player:
 
     def add_item_to_inventory(self, item, purchased=False):
         self.inventory.append(item)
+        self._inventory_by_name.setdefault(item.name.lower(), []).append(item)
         item.coordinates = None # Item is no longer in the world grid
         # is_unpaid and unpaid_from_shop_id should be set before calling this
         if item.is_unpaid:
+            self._unpaid_by_shop.setdefault(item.unpaid_from_shop_id, []).append(item)
             print(f"You discreetly take {item.name}.")
         elif not purchased: # Only print if it's a regular pickup, not a purchase
             print(f"You got {item.name}.")
@@ -214,18 +240,38 @@ class Player:
             if reduction_amount > 0: # Only print if there was an actual reduction
                 print(f"(Your suspicion rating decreased by {reduction_amount}.)")
 
-    def update_suspicion_decay(self):
-        """Passively decays suspicion over time."""
-        self.reduce_suspicion_from_activity(0.5) # Decay by 0.5 each turn
+    def update_suspicion_decay(self, turns=1):
+        """Passively decays suspicion over time; turns is how many turns have passed since the last decay."""
+        self.reduce_suspicion_from_activity(0.5 * turns) # Decay by 0.5 each turn
+    def _find_inventory_item(self, item_name):
+        """Returns the first item in the inventory named item_name (case-insensitive), or None."""
+        matches = self._inventory_by_name.get(item_name.lower())
+        return matches[0] if matches else None
+
+    def _discard_from_inventory(self, item):
+        """Takes item out of the inventory list and the by-name index."""
+        self.inventory.remove(item)
+        key = item.name.lower()
+        matches = self._inventory_by_name[key]
+        matches.remove(item)
+        if not matches:
+            del self._inventory_by_name[key]
+        if item.is_unpaid:
+            self._forget_unpaid(item)
+
+    def _forget_unpaid(self, item):
+        """Drops item from the per-shop unpaid index (it left the bag or was paid for)."""
+        unpaid = self._unpaid_by_shop.get(item.unpaid_from_shop_id)
+        if unpaid and item in unpaid:
+            unpaid.remove(item)
+            if not unpaid:
+                del self._unpaid_by_shop[item.unpaid_from_shop_id]
+
     def remove_item_from_inventory(self, item_name):
-        item_to_drop = None
-        for item in self.inventory:
-            if item.name.lower() == item_name.lower():
-                item_to_drop = item
-                break
+        item_to_drop = self._find_inventory_item(item_name)
         
         if item_to_drop:
-            self.inventory.remove(item_to_drop)
+            self._discard_from_inventory(item_to_drop)
             print(f"You dropped {item_to_drop.name}.")
             if self.current_area:
                 player_gx, player_gy = self.get_grid_position()
@@ -234,17 +280,19 @@ class Player:
             print(f"You don't have '{item_name}' in your inventory.")
 
     def pick_up(self, item_name_query, item_manager): # Added item_manager
-        if not self.current_area:
+        area = self.current_area
+        if not area:
             print("You are not in an area to pick up items from.")
             return
 
         player_gx, player_gy = self.get_grid_position()
-        objects_at_player = self.current_area.get_objects_at_grid_cell(player_gx, player_gy)
+        objects_at_player = area.get_objects_at_grid_cell(player_gx, player_gy)
+        query = item_name_query.lower()
         item_to_pickup = None
 
         # Case 1: Picking up a loose item already existing in the area's grid
         for obj in objects_at_player:
-            if isinstance(obj, Item) and obj.name.lower() == item_name_query.lower():
+            if obj._is_item and obj.name.lower() == query:
                 if obj.pickupable:
                     item_to_pickup = obj
                     break
@@ -252,19 +300,19 @@ class Player:
                     print(f"You can't pick up {obj.name}.")
                     return
         if item_to_pickup:
-            self.current_area.remove_object_from_grid(item_to_pickup, player_gx, player_gy)
+            area.remove_object_from_grid(item_to_pickup, player_gx, player_gy)
             self.add_item_to_inventory(item_to_pickup, purchased=False)
             return
 
         # Case 2: "Picking up" (potentially stealing) an item from a shop's stock
-        if hasattr(self.current_area, 'shop_sells_stock'): # It's a Shop
-            shop_item_details = self.current_area.shop_sells_stock.get(item_name_query.lower())
+        if area.is_shop:
+            shop_item_details = area.shop_sells_stock.get(query)
             if shop_item_details and shop_item_details['stock'] > 0:
                 # Create a new instance of the item for the player
                 stolen_item_instance = item_manager.create_instance(shop_item_details['prototype'].name)
                 if stolen_item_instance:
                     stolen_item_instance.is_unpaid = True
-                    stolen_item_instance.unpaid_from_shop_id = self.current_area.id
+                    stolen_item_instance.unpaid_from_shop_id = area.id
                     self.add_item_to_inventory(stolen_item_instance, purchased=False) # is_unpaid handles message
                     # Note: We are NOT decrementing shop_sells_stock here.
                     # The item is "taken" but the shop still thinks it has it for sale.
@@ -279,33 +327,35 @@ class Player:
         print(f"You don't see '{item_name_query}' here to pick up, or it's not available in the shop.")
 
     def show_inventory(self):
-        if not self.inventory: print("Your bag is empty.")
-        else:
-            print("\nYour Bag:")
-            for item in self.inventory: print(f"  - {item.name}")
-        print(f"Park Tickets (Money): ${self.money:.2f}")
-        print(f"Suspicion Rating: {self.suspicion_rating}")
+        if not self.inventory: lines = ["Your bag is empty."]
+        else: lines = ["\nYour Bag:"] + [f"  - {item.name}" for item in self.inventory]
+        lines.append(f"Park Tickets (Money): ${self.money:.2f}")
+        lines.append(f"Suspicion Rating: {self.suspicion_rating}")
+        print("\n".join(lines))
 
     def buy_item(self, item_name_query, item_manager):
-        if not self.current_area or not hasattr(self.current_area, 'process_player_purchase'):
+        area = self.current_area
+        if not area or not area.is_shop:
             print("This isn't a place where you can buy things.")
             return
+        # Look the item up once; every branch below reuses the entry
+        query = item_name_query.lower()
+        stock_entry = area.shop_sells_stock.get(query)
 
         # First, check if player is trying to "buy" an item they already "took" (is_unpaid)
-        for item_in_inv in self.inventory:
-            if item_in_inv.name.lower() == item_name_query.lower() and \
-               item_in_inv.is_unpaid and \
-               item_in_inv.unpaid_from_shop_id == self.current_area.id:
+        for item_in_inv in self._inventory_by_name.get(query, ()):
+            if item_in_inv.is_unpaid and item_in_inv.unpaid_from_shop_id == area.id:
                 
-                item_price = self.current_area.shop_sells_stock.get(item_name_query.lower(), {}).get('price', item_in_inv.value)
+                item_price = stock_entry['price'] if stock_entry else item_in_inv.value
                 if self.money >= item_price:
                     self.money -= item_price
+                    self._forget_unpaid(item_in_inv)
                     item_in_inv.is_unpaid = False
                     item_in_inv.unpaid_from_shop_id = None
                     print(f"You pay for the {item_in_inv.name} you were holding. Cost: ${item_price:.2f}. Money: ${self.money:.2f}")
                     self.reduce_suspicion_from_activity(5) # Paying reduces suspicion
                     # Potentially reduce shop stock if we were tracking that for stolen items
-                    # shop_details = self.current_area.shop_sells_stock.get(item_name_query.lower())
+                    # shop_details = stock_entry
                     # if shop_details and shop_details['stock'] != float('inf'):
                     #    shop_details['stock'] -=1 # This is if we want to actually reduce stock on payment of a taken item
                     return
@@ -314,7 +364,7 @@ class Player:
                     return
 
         # If not paying for an already taken item, proceed with normal purchase
-        item_instance, price, status = self.current_area.process_player_purchase(item_name_query, self.money, item_manager)
+        item_instance, price, status = area.process_player_purchase(item_name_query, self.money, item_manager)
 
         if status == "success" and item_instance:
             self.money -= price
@@ -323,7 +373,7 @@ class Player:
             self.reduce_suspicion_from_activity(1) # Small reduction for normal shopping
         elif status == "not_found": print(f"The shop doesn't seem to have '{item_name_query}'.")
         elif status == "out_of_stock": print(f"'{item_name_query}' is out of stock.")
-        elif status == "cannot_afford": print(f"You can't afford that. It costs ${getattr(self.current_area, 'shop_sells_stock', {}).get(item_name_query.lower(), {}).get('price', 0.0):.2f}.")
+        elif status == "cannot_afford": print(f"You can't afford that. It costs ${stock_entry['price']:.2f}.")
         elif status == "creation_failed": print("Something went wrong creating the item.")
 
     def sell_item(self, item_name_query):
@@ -331,24 +381,20 @@ class Player:
             print("This isn't a place where you can sell things.")
             return
 
-        item_to_sell = None
-        for item_in_inv in self.inventory:
-            if item_in_inv.name.lower() == item_name_query.lower():
-                item_to_sell = item_in_inv
-                break
+        item_to_sell = self._find_inventory_item(item_name_query)
 
         if not item_to_sell:
             print(f"You don't have '{item_name_query}' to sell.")
             return
 
         # Handle selling to a FenceShop
-        if isinstance(self.current_area, FenceShop):
+        if self.current_area.is_fence_shop:
             if not item_to_sell.is_unpaid:
                 print(f"'I only deal in... acquired goods,' the fence says, eyeing your {item_to_sell.name}.")
                 return
             
             sell_price = self.current_area.get_fence_price(item_to_sell.value)
-            self.inventory.remove(item_to_sell)
+            self._discard_from_inventory(item_to_sell) # Also takes it out of the unpaid index
             self.money += sell_price
             item_to_sell.is_unpaid = False # Mark as "laundered"
             item_to_sell.unpaid_from_shop_id = None
@@ -357,7 +403,7 @@ class Player:
             return
 
         # Handle selling to a regular Shop
-        if hasattr(self.current_area, 'shop_buys_stock'):
+        if self.current_area.is_shop:
             if item_to_sell.is_unpaid:
                 print(f"You try to sell the {item_to_sell.name}, but the cashier gives you a suspicious look. 'Is this... paid for?'")
                 self.suspicion_rating += 15 # Trying to sell stolen goods to legit shop is very suspicious
@@ -367,27 +413,28 @@ class Player:
             if not shop_buy_details:
                 print(f"This shop isn't buying '{item_name_query}' right now.")
                 return
-            if shop_buy_details['current_stock'] >= shop_buy_details['desired_stock']:
+            if shop_buy_details['needed'] <= 0:
                 print(f"The shop has enough '{item_name_query}' for now.")
                 return
 
             sell_price = shop_buy_details['buy_price']
-            self.inventory.remove(item_to_sell)
+            self._discard_from_inventory(item_to_sell)
             self.money += sell_price
-            shop_buy_details['current_stock'] += 1
+            self.current_area.record_player_sale(item_name_query)
             print(f"You sold {item_to_sell.name} for ${sell_price:.2f}. Remaining money: ${self.money:.2f}")
         else:
             print("This isn't a place where you can sell things.")
 
-    def check_for_theft(self, shop_left):
-        """Checks for unpaid items when leaving a shop and triggers Cast Member detection."""
-        if not hasattr(shop_left, 'is_shop') or not shop_left.is_shop:
+    def check_for_theft(self, shop_left, exit_gx, exit_gy):
+        """
+        Checks for unpaid items when leaving a shop and triggers Cast Member detection.
+        exit_gx/exit_gy is the player's grid cell in shop_left at the moment they left it.
+        """
+        if not shop_left.is_shop:
             return # Not a shop
 
-        unpaid_items_from_this_shop = [
-            item for item in self.inventory
-            if item.is_unpaid and item.unpaid_from_shop_id == shop_left.id
-        ]
+        # Copied, since confiscating items below removes them from the index
+        unpaid_items_from_this_shop = list(self._unpaid_by_shop.get(shop_left.id, ()))
 
         if not unpaid_items_from_this_shop:
             return # No stolen goods from this specific shop
@@ -395,29 +442,38 @@ class Player:
         print(f"You attempt to leave {shop_left.name}...")
         self.suspicion_rating += 10 * len(unpaid_items_from_this_shop) # Higher suspicion for more items
 
-        cast_members_in_shop = [npc for npc in shop_left.npcs if npc.__class__.__name__ == "CastMember"]
+        cast_members_in_shop = [npc for npc in shop_left.npcs if npc._is_cast_member]
         
         if not cast_members_in_shop:
             print("Luckily, no Cast Members seem to be around. You slip out with the goods!")
             # Items remain is_unpaid, player got away with it from this shop
             return
 
-        player_gx, player_gy = shop_left.get_relative_coordinates(self.coordinates) # Player's pos at exit point
+        # Loop-invariant parts of the detection chance, already scaled by each CM's share
+        # (1 / number of CMs), plus local bindings for the per-CM calls
+        share = 1 / len(cast_members_in_shop)
+        base_chance = (0.1 + self.suspicion_rating * 0.01) * share
+        alertness_weight = 0.2 * share
+        distance_penalty = 0.05 * share
+        hypot, roll = math.hypot, random.random
         caught = False
         for cm in cast_members_in_shop:
             cm_gx, cm_gy = cm.get_grid_position()
-            distance = ((player_gx - cm_gx)**2 + (player_gy - cm_gy)**2)**0.5
+            dx, dy = exit_gx - cm_gx, exit_gy - cm_gy
+            distance = hypot(dx, dy)
             
             # Detection chance: higher for closer, more alert CMs, and higher player suspicion
             # Base chance + alertness - distance penalty + suspicion bonus
-            detection_chance = (0.1 + cm.alertness*0.2 - (distance*0.05) + self.suspicion_rating * 0.01) * (1 / len(cast_members_in_shop))
-            detection_chance = max(0.05, min(0.95, detection_chance)) # Clamp chance
+            detection_chance = base_chance + cm.alertness * alertness_weight - distance * distance_penalty
+            # Clamp chance to [0.05, 0.95]
+            if detection_chance < 0.05: detection_chance = 0.05
+            elif detection_chance > 0.95: detection_chance = 0.95
 
-            if random.random() < detection_chance:
+            if roll() < detection_chance:
                 print(f"{cm.name} notices you acting suspiciously with unpaid items!")
                 print(f"'Hey! You haven't paid for those!' {cm.name} exclaims.")
                 for item_to_confiscate in unpaid_items_from_this_shop:
-                    self.inventory.remove(item_to_confiscate)
+                    self._discard_from_inventory(item_to_confiscate)
                     print(f"{item_to_confiscate.name} has been confiscated.")
                 self.suspicion_rating += 20 # Getting caught increases suspicion a lot
                 # Potentially add other penalties: fine, kicked out, etc.
@@ -1 +1,183 @@
-# improve the disneyland game by expanding the stealth/suspicion mechanics
\ No newline at end of file
+# improve the disneyland game by expanding the stealth/suspicion mechanics
+"""
+Tests for the AreaManager spatial lookups and the shop theft check.
+Run from the project root (next to the modules package) with: python -m unittest test
+"""
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+
+from modules.area import Area, AreaManager, Shop, _StaticKDTree
+from modules.coordinates import Coordinates
+from modules.player import Player
+
+
+def _manager_with(*areas):
+    manager = AreaManager()
+    for area in areas:
+        manager.add_area(area)
+    return manager
+
+
+class FindContainingAreaTest(unittest.TestCase):
+    def setUp(self):
+        self.land = Area("Big Land", "d", Coordinates(0, 0), grid_width=10, grid_length=10)
+        self.shop = Area("Small Shop", "d", Coordinates(2, 3), grid_width=3, grid_length=2)
+        self.far = Area("Far Away", "d", Coordinates(20, 0), grid_width=5, grid_length=5)
+        self.manager = _manager_with(self.land, self.shop, self.far)
+
+    def test_point_inside_one_area(self):
+        self.assertIs(self.manager.find_containing_area(8, 8), self.land)
+        self.assertIs(self.manager.find_containing_area(24, 4), self.far)
+
+    def test_smallest_overlapping_area_wins(self):
+        self.assertIs(self.manager.find_containing_area(3, 4), self.shop)
+
+    def test_upper_bounds_are_exclusive(self):
+        self.assertIs(self.manager.find_containing_area(5, 3), self.land) # Just right of the shop
+        self.assertIsNone(self.manager.find_containing_area(10, 0))
+
+    def test_point_outside_every_area(self):
+        self.assertIsNone(self.manager.find_containing_area(15, 2))
+        self.assertIsNone(self.manager.find_containing_area(-1, 0))
+
+    def test_moved_area_is_seen(self):
+        self.assertIsNone(self.manager.find_containing_area(40, 40))
+        self.far.area_origin_coords = Coordinates(38, 38)
+        self.assertIs(self.manager.find_containing_area(40, 40), self.far)
+
+
+class StaticKDTreeTest(unittest.TestCase):
+    """The k-d tree must agree with a brute-force scan over the same points."""
+    def setUp(self):
+        rng = random.Random(1234)
+        self.points = [(rng.uniform(-50, 50), rng.uniform(-50, 50), i) for i in range(200)]
+        self.points += [(0.0, 0.0, 200), (0.0, 0.0, 201)] # Duplicate positions
+        self.tree = _StaticKDTree(self.points)
+        self.queries = [(rng.uniform(-60, 60), rng.uniform(-60, 60)) for _ in range(100)] + [(0.0, 0.0)]
+
+    @staticmethod
+    def _dist_sq(point, x, y):
+        return (point[0] - x) ** 2 + (point[1] - y) ** 2
+
+    def test_nearest_matches_brute_force(self):
+        by_payload = {point[2]: point for point in self.points}
+        for x, y in self.queries:
+            best = min(self._dist_sq(point, x, y) for point in self.points)
+            found = self.tree.nearest(x, y)
+            # Compare distances rather than payloads, since ties may pick either point
+            self.assertEqual(self._dist_sq(by_payload[found], x, y), best)
+
+    def test_within_radius_matches_brute_force(self):
+        for radius in (0, 5, 17.5, 200):
+            for x, y in self.queries:
+                expected = {point[2] for point in self.points if self._dist_sq(point, x, y) <= radius * radius}
+                found = self.tree.within_radius(x, y, radius)
+                self.assertEqual(len(found), len(expected)) # No payload reported twice
+                self.assertEqual(set(found), expected)
+
+    def test_empty_tree(self):
+        tree = _StaticKDTree([])
+        self.assertIsNone(tree.nearest(1, 2))
+        self.assertEqual(tree.within_radius(1, 2, 100), [])
+
+
+class NearestAreaTest(unittest.TestCase):
+    def setUp(self):
+        # Centres at (2, 2), (12, 2) and (2, 22)
+        self.a = Area("Area A", "d", Coordinates(0, 0), grid_width=4, grid_length=4)
+        self.b = Area("Area B", "d", Coordinates(10, 0), grid_width=4, grid_length=4)
+        self.c = Area("Area C", "d", Coordinates(0, 20), grid_width=4, grid_length=4)
+        self.manager = _manager_with(self.a, self.b, self.c)
+
+    def test_find_nearest_area(self):
+        self.assertIs(self.manager.find_nearest_area(3, 3), self.a)
+        self.assertIs(self.manager.find_nearest_area(9, 1), self.b)
+        self.assertIs(self.manager.find_nearest_area(0, 30), self.c)
+
+    def test_find_areas_in_radius(self):
+        self.assertEqual(set(self.manager.find_areas_in_radius(2, 2, 10)), {self.a, self.b})
+        self.assertEqual(set(self.manager.find_areas_in_radius(2, 2, 20)), {self.a, self.b, self.c})
+        self.assertEqual(self.manager.find_areas_in_radius(100, 100, 5), [])
+
+    def test_index_follows_new_and_moved_areas(self):
+        self.assertIs(self.manager.find_nearest_area(52, 52), self.c)
+        d = Area("Area D", "d", Coordinates(50, 50), grid_width=4, grid_length=4)
+        self.manager.add_area(d)
+        self.assertIs(self.manager.find_nearest_area(52, 52), d)
+        self.c.area_origin_coords = Coordinates(60, 60)
+        self.assertIs(self.manager.find_nearest_area(62, 62), self.c)
+
+    def test_no_areas(self):
+        self.assertIsNone(AreaManager().find_nearest_area(0, 0))
+
+
+class FindPathTest(unittest.TestCase):
+    def setUp(self):
+        # a <-> b <-> c, plus a one-way shortcut a -> d -> c; e is not connected to anything
+        self.a, self.b, self.c, self.d, self.e = (Area(f"Node {n}", "d") for n in "ABCDE")
+        self.a.add_connection("east", self.b)
+        self.b.add_connection("east", self.c)
+        self.a.add_connection("enter node d", self.d)
+        self.d.add_connection("enter node c", self.c)
+        self.manager = _manager_with(self.a, self.b, self.c, self.d, self.e)
+
+    def _ids(self, *areas):
+        return [area.id for area in areas]
+
+    def test_shortest_path(self):
+        path = self.manager.find_path(self.a.id, self.c.id)
+        self.assertEqual(len(path), 3)
+        self.assertIn(path, (self._ids(self.a, self.b, self.c), self._ids(self.a, self.d, self.c)))
+
+    def test_follows_connection_direction(self):
+        # d -> c is one-way, so going back from c has to use the two-way links
+        self.assertEqual(self.manager.find_path(self.c.id, self.a.id), self._ids(self.c, self.b, self.a))
+        self.assertEqual(self.manager.find_path(self.c.id, self.d.id), self._ids(self.c, self.b, self.a, self.d))
+
+    def test_src_equals_dst(self):
+        self.assertEqual(self.manager.find_path(self.b.id, self.b.id), self._ids(self.b))
+
+    def test_unreachable_and_unknown(self):
+        self.assertIsNone(self.manager.find_path(self.a.id, self.e.id))
+        self.assertIsNone(self.manager.find_path(self.e.id, self.a.id))
+        self.assertIsNone(self.manager.find_path(self.a.id, "area_nowhere"))
+
+    def test_accepts_names(self):
+        self.assertEqual(self.manager.find_path("node b", "Node C"), self._ids(self.b, self.c))
+
+    def test_new_connection_is_seen(self):
+        self.assertIsNone(self.manager.find_path(self.a.id, self.e.id))
+        self.c.add_connection("enter node e", self.e)
+        self.assertEqual(len(self.manager.find_path(self.a.id, self.e.id)), 4)
+
+    def test_neighbors(self):
+        area_list = list(self.manager.areas.values())
+        names = lambda index: {area_list[i].name for i in self.manager.neighbors(index)}
+        self.assertEqual(names(area_list.index(self.a)), {"Node B", "Node D"})
+        self.assertEqual(names(area_list.index(self.c)), {"Node B"})
+        self.assertEqual(names(area_list.index(self.e)), set())
+
+
+class TheftExitPositionTest(unittest.TestCase):
+    """check_for_theft must get the player's cell in the shop, not their cell in the area they went to."""
+    def test_exit_cell_is_recorded_before_leaving(self):
+        shop = Shop("Small Shop", "d", Coordinates(20, 0), grid_width=5, grid_length=5)
+        other = Area("Far Away", "d", Coordinates(40, 0), grid_width=10, grid_length=10)
+        calls = []
+
+        class RecordingPlayer(Player):
+            def check_for_theft(self, shop_left, exit_gx, exit_gy):
+                calls.append((shop_left, exit_gx, exit_gy))
+
+        player = RecordingPlayer()
+        with redirect_stdout(io.StringIO()):
+            player.set_current_area(shop, 1, 3)
+            player.move("east")
+            player.set_current_area(other, 7, 7)
+        self.assertEqual(calls, [(shop, 2, 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()